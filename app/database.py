@@ -1,3 +1,5 @@
+import hashlib
+import logging
 import os
 from datetime import UTC, datetime
 from typing import Any
@@ -8,6 +10,7 @@ from sqlalchemy import (
     Column,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
@@ -16,6 +19,8 @@ from sqlalchemy import (
 )
 from sqlalchemy.orm import Session, declarative_base, relationship, sessionmaker
 
+logger = logging.getLogger(__name__)
+
 
 def get_database_url(url: str | None = None) -> str:
     """Get and normalize the database URL.
@@ -48,16 +53,34 @@ def get_database_url(url: str | None = None) -> str:
     return url
 
 
+# Connection pool sizing per worker process. Each of the 4 gunicorn workers
+# owns a pool, so the defaults allow up to 4 * (5 + 5) = 40 connections, which
+# stays under the connection limit of small hosted Postgres plans
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "5"))
+DB_POOL_RECYCLE = 1800
+
+
 def create_db_engine(database_url: str):
     """Create a SQLAlchemy engine for PostgreSQL.
 
+    The pool keeps warm connections across requests, pings them on checkout so
+    connections dropped by the server are replaced transparently, and recycles
+    them before typical managed-Postgres idle timeouts.
+
     Args:
         database_url: The PostgreSQL database URL to connect to.
 
     Returns:
         SQLAlchemy engine instance.
     """
-    return create_engine(database_url)
+    return create_engine(
+        database_url,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_pre_ping=True,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
 
 
 # Module-level engine singleton management
@@ -183,6 +206,12 @@ class CompletedProblem(Base):
 
     user = relationship("User", back_populates="completed_problems")
 
+    # Backs the per-user completion lookups and lets inserts skip duplicates
+    # with ON CONFLICT instead of checking first
+    __table_args__ = (
+        Index("ix_completed_user_problem", "user_id", "problem_id", unique=True),
+    )
+
 
 class UserRepo(Base):
     """Tracks repos created from templates for each user's codespace sessions."""
@@ -263,13 +292,15 @@ class CodespaceToken(Base):
     __tablename__ = "codespace_tokens"
 
     id = Column(Integer, primary_key=True, index=True)
-    token = Column(String, unique=True, index=True, nullable=False)
+    # SHA-256 of the token handed to the codespace; the raw token is not stored
+    token_hash = Column(String(64), unique=True, index=True, nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
     problem_id = Column(String, ForeignKey("problems.id"), index=True, nullable=False)
     codespace_name = Column(String, index=True, nullable=False)
     used = Column(Boolean, default=False)  # Track if token has been used
     created_at = Column(DateTime, default=lambda: datetime.now(UTC))
-    expires_at = Column(DateTime, nullable=False)  # Token expiration time
+    # Token expiration time, stored timezone-aware so comparisons need no fixup
+    expires_at = Column(DateTime(timezone=True), nullable=False)
 
     user = relationship("User")
     problem = relationship("Problem")
@@ -347,6 +378,19 @@ def delete_problem_and_dependencies(db: Session, problem_id: str) -> None:
     db.query(Problem).filter(Problem.id == problem_id).delete(synchronize_session=False)
 
 
+def hash_codespace_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def purge_expired_codespace_tokens(db: Session) -> int:
+    """Delete expired codespace tokens and return how many were removed."""
+    return (
+        db.query(CodespaceToken)
+        .filter(CodespaceToken.expires_at < datetime.now(UTC))
+        .delete(synchronize_session=False)
+    )
+
+
 def _backfill_problem_ownership(db: Session) -> None:
     maintainer = db.query(User).filter(User.login == MAINTAINER_LOGIN).first()
     if maintainer is None:
@@ -441,13 +485,63 @@ def _run_migrations():
             """,
             "Create problem_solution_submissions table",
         ),
+        (
+            """
+            SELECT indexname FROM pg_indexes
+            WHERE tablename = 'completed_problems'
+            AND indexname = 'ix_completed_user_problem'
+            """,
+            # Drop duplicate completions (keeping the earliest) so the unique
+            # index can be built
+            """
+            DELETE FROM completed_problems a
+            USING completed_problems b
+            WHERE a.user_id = b.user_id
+            AND a.problem_id = b.problem_id
+            AND a.id > b.id;
+            CREATE UNIQUE INDEX ix_completed_user_problem
+            ON completed_problems (user_id, problem_id)
+            """,
+            "Add unique (user_id, problem_id) index to completed_problems table",
+        ),
+        (
+            """
+            SELECT column_name FROM information_schema.columns
+            WHERE table_name = 'codespace_tokens' AND column_name = 'expires_at'
+            AND data_type = 'timestamp with time zone'
+            """,
+            # Existing naive values were written as UTC
+            """
+            ALTER TABLE codespace_tokens
+            ALTER COLUMN expires_at TYPE TIMESTAMP WITH TIME ZONE
+            USING expires_at AT TIME ZONE 'UTC'
+            """,
+            "Make codespace_tokens.expires_at timezone-aware",
+        ),
+        (
+            """
+            SELECT column_name FROM information_schema.columns
+            WHERE table_name = 'codespace_tokens' AND column_name = 'token_hash'
+            """,
+            # Hash the stored tokens in place, then drop the raw column
+            """
+            ALTER TABLE codespace_tokens ADD COLUMN token_hash VARCHAR(64);
+            UPDATE codespace_tokens
+            SET token_hash = encode(sha256(convert_to(token, 'UTF8')), 'hex');
+            ALTER TABLE codespace_tokens ALTER COLUMN token_hash SET NOT NULL;
+            CREATE UNIQUE INDEX ix_codespace_tokens_token_hash
+            ON codespace_tokens (token_hash);
+            ALTER TABLE codespace_tokens DROP COLUMN token
+            """,
+            "Store hashed tokens in codespace_tokens",
+        ),
     ]
 
     with engine.connect() as conn:
         for check_sql, migrate_sql, description in migrations:
             result = conn.execute(text(check_sql))
             if result.fetchone() is None:
-                print(f"[Migration] {description}")
+                logger.info("[Migration] %s", description)
                 conn.execute(text(migrate_sql))
                 conn.commit()
 
@@ -482,7 +576,7 @@ def _seed_initial_data():
             slow_api_problem_row.domain_specialization = SLOW_API_DOMAIN_SPECIALIZATION
             db.add(slow_api_problem)
             db.flush()
-            print("[Seed] Added initial problem: slow-api")
+            logger.info("[Seed] Added initial problem: slow-api")
         else:
             slow_api_problem_row: Any = slow_api_problem
             if not getattr(slow_api_problem, "detail_summary", None):
@@ -515,7 +609,7 @@ def _seed_initial_data():
                 SLOW_API_SOLUTION_VIDEO_URL
             )
             db.add(submission)
-            print("[Seed] Added slow-api solution submission")
+            logger.info("[Seed] Added slow-api solution submission")
         elif not getattr(existing_submission, "embed_url", None):
             existing_submission_row: Any = existing_submission
             existing_submission_row.embed_url = normalize_youtube_embed_url(
@@ -524,8 +618,8 @@ def _seed_initial_data():
 
         _backfill_problem_ownership(db)
         db.commit()
-    except Exception as e:
-        print(f"[Seed] Error seeding data: {e}")
+    except Exception:
+        logger.exception("[Seed] Error seeding data")
         db.rollback()
     finally:
         db.close()
@@ -1,19 +1,39 @@
+import asyncio
+import base64
+import binascii
+import hashlib
+import hmac
+import logging
 import os
 import secrets
-from contextlib import asynccontextmanager
+import struct
+import sys
+import time
+from contextlib import asynccontextmanager, suppress
 from datetime import UTC, datetime, timedelta
-from typing import Any, cast
-from urllib.parse import urlparse
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from operator import itemgetter
+from typing import Any, NamedTuple, cast
+from urllib.parse import urlencode, urlparse
 
 import httpx
+import orjson
 from dotenv import load_dotenv
 from fastapi import Depends, FastAPI, HTTPException, Request
-from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import (
+    HTMLResponse,
+    ORJSONResponse,
+    RedirectResponse,
+    Response,
+)
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from itsdangerous import BadSignature, URLSafeTimedSerializer
+from jinja2 import FileSystemBytecodeCache
 from pydantic import BaseModel
-from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import exists, insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, joinedload, load_only, selectinload
 
 from .database import (
     MAINTAINER_LOGIN,
@@ -25,24 +45,60 @@ from .database import (
     delete_problem_and_dependencies,
     get_db,
     get_managed_problem_walkthrough_submission,
+    get_session_local,
+    hash_codespace_token,
     init_db,
     normalize_youtube_embed_url,
+    purge_expired_codespace_tokens,
     sync_managed_problem_walkthrough_submission,
 )
 
 # Load environment variables from .env file
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Expired completion tokens are swept hourly so the table stays small
+CODESPACE_TOKEN_SWEEP_INTERVAL = 3600.0
+
+
+def sweep_expired_codespace_tokens() -> None:
+    db = get_session_local()()
+    try:
+        removed = purge_expired_codespace_tokens(db)
+        db.commit()
+    finally:
+        db.close()
+    if removed:
+        logger.info("Removed %d expired codespace tokens", removed)
+
+
+async def sweep_expired_codespace_tokens_periodically() -> None:
+    while True:
+        try:
+            await asyncio.to_thread(sweep_expired_codespace_tokens)
+        except Exception:
+            logger.exception("Failed to sweep expired codespace tokens")
+        await asyncio.sleep(CODESPACE_TOKEN_SWEEP_INTERVAL)
+
 
 @asynccontextmanager
 async def lifespan(_app: FastAPI):
     # Startup
     init_db()
+    await warm_http_client()
+    token_sweeper = asyncio.create_task(sweep_expired_codespace_tokens_periodically())
     yield
     # Shutdown
+    token_sweeper.cancel()
+    await close_http_client()
 
 
-app = FastAPI(title="LLMeetCode - Coding Interview Platform", lifespan=lifespan)
+app = FastAPI(
+    title="LLMeetCode - Coding Interview Platform",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 # Configuration
 GITHUB_CLIENT_ID = os.getenv("GITHUB_CLIENT_ID")
@@ -52,15 +108,220 @@ GITHUB_REDIRECT_URI = os.getenv(
 )
 SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-change-in-production")
 API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
+GITHUB_OAUTH_SCOPE = "codespace user:email repo delete_repo"
+# Everything in the authorize URL is fixed at startup, so build it once
+GITHUB_AUTHORIZE_URL = "https://github.com/login/oauth/authorize?" + urlencode(
+    {
+        "client_id": GITHUB_CLIENT_ID or "",
+        "redirect_uri": GITHUB_REDIRECT_URI,
+        "scope": GITHUB_OAUTH_SCOPE,
+    }
+)
 
 # Session management
-serializer = URLSafeTimedSerializer(SECRET_KEY)
+SESSION_MAX_AGE = 3600  # 1 hour expiry
+
+
+def build_session_cookie_template(secure: bool) -> str:
+    """Return the Set-Cookie value for a session, with ``{token}`` to fill in."""
+    template = (
+        f"session={{token}}; HttpOnly; Max-Age={SESSION_MAX_AGE}; Path=/; SameSite=lax"
+    )
+    return f"{template}; Secure" if secure else template
+
+
+# Only the token varies between session cookies, so the attributes are
+# formatted once rather than by Starlette's cookie builder on every login.
+# Deployments with an https OAuth callback are served over https, so the
+# cookie is marked Secure there; local http development keeps it usable.
+SESSION_COOKIE_SECURE = GITHUB_REDIRECT_URI.startswith("https://")
+SESSION_COOKIE_TEMPLATE = build_session_cookie_template(SESSION_COOKIE_SECURE)
+
+
+class BadSessionToken(Exception):
+    """Raised when a session token is malformed, tampered with, or expired."""
+
+
+class SessionSerializer:
+    """Sign and verify session cookie payloads.
+
+    Tokens are ``base64url(hmac_sha256 | issued_at | json)``. Signing the
+    raw bytes with the stdlib ``hmac`` module keeps the per-request cost to
+    one digest, one base64 decode, and one orjson parse.
+    """
+
+    _DIGEST_SIZE = hashlib.sha256().digest_size
+    _TIMESTAMP = struct.Struct(">I")
+
+    def __init__(self, secret_key: str):
+        self._key = secret_key.encode()
+
+    def _sign(self, payload: bytes) -> bytes:
+        return hmac.new(self._key, payload, hashlib.sha256).digest()
+
+    def dumps(self, data: dict[str, Any]) -> str:
+        payload = self._TIMESTAMP.pack(int(time.time())) + orjson.dumps(data)
+        token = base64.urlsafe_b64encode(self._sign(payload) + payload)
+        return token.rstrip(b"=").decode()
+
+    def loads(self, token: str, max_age: int = SESSION_MAX_AGE) -> dict[str, Any]:
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        except (binascii.Error, ValueError) as e:
+            raise BadSessionToken("Malformed session token") from e
+
+        signature, payload = raw[: self._DIGEST_SIZE], raw[self._DIGEST_SIZE :]
+        if len(payload) < self._TIMESTAMP.size or not hmac.compare_digest(
+            signature, self._sign(payload)
+        ):
+            raise BadSessionToken("Invalid session signature")
+
+        (issued_at,) = self._TIMESTAMP.unpack_from(payload)
+        age = time.time() - issued_at
+        if age < 0 or age > max_age:
+            raise BadSessionToken("Session token expired")
+
+        try:
+            data = orjson.loads(payload[self._TIMESTAMP.size :])
+        except ValueError as e:
+            raise BadSessionToken("Malformed session payload") from e
+        if not isinstance(data, dict):
+            raise BadSessionToken("Malformed session payload")
+        return data
+
+
+serializer = SessionSerializer(SECRET_KEY)
+
+# GitHub HTTP client
+# Codespace creation waits on template generation, so it gets a longer timeout.
+CODESPACE_REQUEST_TIMEOUT = 60.0
+# Backoff schedule (seconds) while waiting for a generated repo's branch
+BRANCH_POLL_INITIAL_DELAY = 0.25
+BRANCH_POLL_MAX_DELAY = 4.0
+BRANCH_POLL_TIMEOUT = 20.0
+# Machine types for a template change rarely, so the resolved choice is
+# cached instead of being re-fetched for every codespace. GitHub answers per
+# user (billing and org policy differ), so entries are keyed by user as well.
+DEFAULT_MACHINE_TYPE = "basicLinux32gb"
+MACHINE_TYPE_CACHE_TTL = 300.0
+_machine_type_cache: dict[tuple[str, int], tuple[float, str]] = {}
+# Upper bound on codespace creations talking to GitHub at once, so a burst of
+# users queues here instead of tripping GitHub's secondary rate limits
+GITHUB_MAX_CONCURRENCY = int(os.getenv("GH_MAX_CONCURRENCY", "20"))
+_codespace_creation_semaphore = asyncio.Semaphore(GITHUB_MAX_CONCURRENCY)
+# Last llmeetcode codespace listing and its GitHub ETag per access token digest,
+# so repeat listings can be revalidated with If-None-Match
+CODESPACE_LIST_ETAG_CACHE_SIZE = 1024
+_codespace_list_etags: dict[str, tuple[str, list[dict]]] = {}
+# Active problems are read on most pages but change only through authoring
+PROBLEM_CATALOG_TTL = 60.0
+_problem_catalog: tuple[float, "ProblemCatalog"] | None = None
+# Display names of codespaces created here: "llmeetcode-{problem_id}-{hex}"
+CODESPACE_NAME_PREFIX = "llmeetcode-"
+# Page renders reuse a user's codespace listing briefly instead of calling
+# GitHub on every load; entries are dropped when the user creates or deletes one
+CODESPACE_LIST_CACHE_TTL = 30.0
+CODESPACE_LIST_CACHE_SIZE = 1024
+_codespace_list_cache: dict[int, tuple[float, list[dict]]] = {}
+# Codespace creations in progress, keyed by (user_id, problem_id)
+_inflight_codespace_creations: dict[tuple[int, str], asyncio.Task[dict]] = {}
+# API calls use paths relative to this; OAuth calls to github.com stay absolute
+GITHUB_API_URL = "https://api.github.com"
+# Sent on every GitHub call by the shared client; requests only add auth
+GITHUB_API_HEADERS = {
+    "Accept": "application/vnd.github.v3+json",
+    "X-GitHub-Api-Version": "2022-11-28",
+}
+# The OAuth token endpoint on github.com answers form-encoded unless asked
+GITHUB_OAUTH_TOKEN_HEADERS = {"Accept": "application/json"}
+_http_client: httpx.AsyncClient | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get or create the shared HTTP client (lazy initialization).
+
+    Reusing one client keeps connections to github.com and api.github.com
+    pooled across requests instead of paying a TLS handshake per call, and
+    HTTP/2 lets concurrent calls share a single connection.
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        # Pool limits belong to the transport once one is passed explicitly
+        transport = httpx.AsyncHTTPTransport(
+            http2=True,
+            retries=0,
+            limits=httpx.Limits(
+                max_connections=100,
+                max_keepalive_connections=32,
+                keepalive_expiry=60.0,
+            ),
+        )
+        # The client is shared by every user, so cookies GitHub sets during one
+        # user's OAuth exchange must not be replayed on another's
+        cookie_jar = CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+        _http_client = httpx.AsyncClient(
+            base_url=GITHUB_API_URL,
+            transport=transport,
+            headers=GITHUB_API_HEADERS,
+            cookies=cookie_jar,
+            timeout=httpx.Timeout(10.0, connect=3.0),
+        )
+    return _http_client
+
+
+async def warm_http_client():
+    """Open a connection to the GitHub API ahead of the first real request.
+
+    This resolves DNS and completes the TLS handshake at startup so the first
+    user does not pay for it. Failures are ignored; requests will simply
+    connect on demand.
+    """
+    try:
+        await get_http_client().head("/")
+    except httpx.HTTPError as e:
+        logger.info("Skipping GitHub connection warm-up: %s", e)
+
+
+def github_auth_headers(access_token: str) -> dict[str, str]:
+    """Per-request headers for a GitHub API call made with a user's token."""
+    return {"Authorization": f"Bearer {access_token}"}
+
+
+def parse_github_json(response: httpx.Response) -> Any:
+    """Decode a GitHub API response body with orjson."""
+    return orjson.loads(response.content)
+
+
+async def close_http_client():
+    """Close the shared HTTP client. Called on application shutdown."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+    _http_client = None
+
 
 # Templates
 templates = Jinja2Templates(directory="app/templates")
+# Compiled templates stay cached without a per-render mtime check; set
+# TEMPLATE_AUTO_RELOAD=1 while editing templates locally
+templates.env.auto_reload = os.getenv("TEMPLATE_AUTO_RELOAD") == "1"
+# Share compiled template bytecode between workers and across restarts
+templates.env.bytecode_cache = FileSystemBytecodeCache()
 
 # Static files
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+STATIC_CACHE_CONTROL = "public, max-age=86400"
+
+
+class CachedStaticFiles(StaticFiles):
+    """Static files that browsers may reuse for a day without revalidating."""
+
+    def file_response(self, *args: Any, **kwargs: Any) -> Response:
+        response = super().file_response(*args, **kwargs)
+        response.headers.setdefault("Cache-Control", STATIC_CACHE_CONTROL)
+        return response
+
+
+app.mount("/static", CachedStaticFiles(directory="app/static"), name="static")
 
 
 class CodespaceRequest(BaseModel):
@@ -93,14 +354,48 @@ AUTHORING_DEFAULT_FORM_DATA = {
 
 
 def get_session_data(request: Request) -> dict[str, Any]:
-    """Get session data from encrypted cookie"""
+    """Get session data from encrypted cookie.
+
+    The decoded session is memoized on ``request.state`` so helpers that look
+    it up again during the same request skip re-verifying the signature.
+    """
+    cached = getattr(request.state, "session_data", None)
+    if isinstance(cached, dict):
+        return cached
+
+    session_data: dict[str, Any] = {}
     session_token = request.cookies.get("session")
-    if not session_token:
-        return {}
-    try:
-        return serializer.loads(session_token, max_age=3600)  # 1 hour expiry
-    except BadSignature:
-        return {}
+    if session_token:
+        with suppress(BadSessionToken):
+            session_data = serializer.loads(session_token, max_age=SESSION_MAX_AGE)
+    request.state.session_data = session_data
+    return session_data
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match already names this ETag."""
+    if_none_match = request.headers.get("if-none-match", "")
+    client_etags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in client_etags
+
+
+def with_etag(
+    request: Request, response: Response, cache_control: str = "private, no-cache"
+) -> Response:
+    """Tag a rendered response with an ETag and answer 304 if the client has it.
+
+    The tag is derived from the response body, so any change in rendered
+    content (including per-user state) produces a new tag.
+    """
+    etag = f'"{hashlib.blake2b(response.body, digest_size=16).hexdigest()}"'
+    if etag_matches(request, etag):
+        return Response(
+            status_code=304, headers={"ETag": etag, "Cache-Control": cache_control}
+        )
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+    return response
 
 
 def _get_youtube_host(video_url: str) -> str:
@@ -241,12 +536,11 @@ def validate_problem_authoring_form(
         errors["problem_id"] = "Use lowercase letters, numbers, and hyphens only."
     elif problem_id.startswith("-") or problem_id.endswith("-") or "--" in problem_id:
         errors["problem_id"] = "Use single hyphens between words."
-    elif (
-        db.query(Problem)
-        .filter(Problem.id == problem_id, Problem.id != (current_problem_id or ""))
-        .first()
-        is not None
-    ):
+    elif db.query(
+        exists().where(
+            Problem.id == problem_id, Problem.id != (current_problem_id or "")
+        )
+    ).scalar():
         errors["problem_id"] = "That problem id already exists."
 
     if not title:
@@ -321,7 +615,7 @@ def get_authenticated_user(session: dict[str, Any], db: Session) -> User | None:
     if user_id is None:
         return None
 
-    return db.query(User).filter(User.id == user_id).first()
+    return db.get(User, user_id)
 
 
 def can_manage_problem(user: User | None, problem: Problem) -> bool:
@@ -376,19 +670,18 @@ async def build_problem_page_context(
     if problem is not None:
         context["can_manage_problem"] = can_manage_problem(current_user, problem)
 
-    context["is_completed"] = (
-        db.query(CompletedProblem)
-        .filter(
+    context["is_completed"] = db.query(
+        exists().where(
             CompletedProblem.user_id == session["user_id"],
             CompletedProblem.problem_id == problem_id,
         )
-        .first()
-        is not None
-    )
+    ).scalar()
 
     if session.get("access_token"):
         try:
-            codespaces = await list_user_codespaces(session["access_token"], problem_id)
+            codespaces = await list_user_codespaces_cached(
+                session["user_id"], session["access_token"], problem_id
+            )
             if codespaces:
                 context["active_codespace_url"] = codespaces[0]["web_url"]
         except Exception:
@@ -397,6 +690,97 @@ async def build_problem_page_context(
     return context
 
 
+class ProblemCatalog(NamedTuple):
+    """Snapshot of the active problems with precomputed filter facets.
+
+    ``api_body`` is the id-ordered JSON served by /api/problems and
+    ``fingerprint`` its digest, so each snapshot is serialized and hashed once.
+    """
+
+    by_id: dict[str, dict[str, Any]]
+    difficulties: tuple[str, ...]
+    languages: tuple[str, ...]
+    ids_by_difficulty: dict[str, frozenset[str]]
+    ids_by_language: dict[str, frozenset[str]]
+    api_body: bytes
+    api_etag: str
+    fingerprint: str
+
+
+def build_problem_catalog(problems: list[dict[str, Any]]) -> ProblemCatalog:
+    ids_by_difficulty: dict[str, set[str]] = {}
+    ids_by_language: dict[str, set[str]] = {}
+    for problem in problems:
+        ids_by_difficulty.setdefault(problem["difficulty"], set()).add(problem["id"])
+        ids_by_language.setdefault(problem["language"], set()).add(problem["id"])
+
+    by_id = {problem["id"]: problem for problem in problems}
+    api_body = orjson.dumps([by_id[problem_id] for problem_id in sorted(by_id)])
+    fingerprint = hashlib.blake2b(api_body, digest_size=16).hexdigest()
+    return ProblemCatalog(
+        by_id=by_id,
+        difficulties=tuple(sorted(ids_by_difficulty)),
+        languages=tuple(sorted(ids_by_language)),
+        ids_by_difficulty={
+            key: frozenset(ids) for key, ids in ids_by_difficulty.items()
+        },
+        ids_by_language={key: frozenset(ids) for key, ids in ids_by_language.items()},
+        api_body=api_body,
+        api_etag=f'"{fingerprint}"',
+        fingerprint=fingerprint,
+    )
+
+
+def get_active_problem_catalog(db: Session) -> ProblemCatalog:
+    """Return the active problem catalog, reusing a recent snapshot.
+
+    The catalog changes only when a problem is authored, edited, or deleted,
+    so reads share a snapshot for up to PROBLEM_CATALOG_TTL. Writes in this
+    process invalidate it immediately; the TTL bounds how long other workers
+    can serve a stale copy. Callers must treat the entries as read-only.
+    """
+    global _problem_catalog
+    if (
+        _problem_catalog is not None
+        and time.monotonic() - _problem_catalog[0] <= PROBLEM_CATALOG_TTL
+    ):
+        return _problem_catalog[1]
+
+    rows = db.query(
+        Problem.id,
+        Problem.title,
+        Problem.description,
+        Problem.difficulty,
+        Problem.language,
+        Problem.template_repo,
+    ).filter(Problem.is_active.is_(True))
+    catalog = build_problem_catalog([row._asdict() for row in rows])
+    _problem_catalog = (time.monotonic(), catalog)
+    return catalog
+
+
+def invalidate_problem_catalog() -> None:
+    global _problem_catalog
+    _problem_catalog = None
+
+
+def get_cached_machine_type(template_repo: str, user_id: int) -> str | None:
+    """Return a user's cached machine type for a template repo, if still fresh."""
+    entry = _machine_type_cache.get((template_repo, user_id))
+    if entry is None:
+        return None
+
+    cached_at, machine_type = entry
+    if time.monotonic() - cached_at > MACHINE_TYPE_CACHE_TTL:
+        _machine_type_cache.pop((template_repo, user_id), None)
+        return None
+    return machine_type
+
+
+def cache_machine_type(template_repo: str, user_id: int, machine_type: str) -> None:
+    _machine_type_cache[(template_repo, user_id)] = (time.monotonic(), machine_type)
+
+
 async def create_codespace(
     access_token: str, problem_id: str, username: str, user_id: int, db: Session
 ) -> dict:
@@ -418,91 +802,93 @@ async def create_codespace(
         Dict with codespace info: name, web_url, state, created_at, repo_name
     """
 
-    # Validate problem ID exists and get problem from database
-    problem = (
-        db.query(Problem)
-        .filter(Problem.id == problem_id, Problem.is_active.is_(True))
-        .first()
-    )
+    # Validate problem ID exists and get problem from the active catalog
+    problem = get_active_problem_catalog(db).by_id.get(problem_id)
     if not problem:
         raise HTTPException(status_code=404, detail="Problem not found")
 
     # Get the template repo from the problem
-    template_repo = problem.template_repo
+    template_repo = cast(str, problem["template_repo"])
+
+    headers = github_auth_headers(access_token)
+
+    client = get_http_client()
+    # Step 1: Create a new repo from the template in the user's account
+    # The repo and the codespace share one name so either can be traced back
+    # to the other; the suffix stays hex so list_user_codespaces can split
+    # the problem id off at the last hyphen
+    unique_suffix = secrets.token_hex(4)
+    new_repo_name = f"{CODESPACE_NAME_PREFIX}{problem_id}-{unique_suffix}"
+
+    # Create repo from template
+    create_repo_response = await client.post(
+        f"/repos/{template_repo}/generate",
+        json={
+            "owner": username,
+            "name": new_repo_name,
+            "private": True,
+            "description": f"LLMeetCode interview problem: {problem['title']}",
+        },
+        headers=headers,
+        timeout=CODESPACE_REQUEST_TIMEOUT,
+    )
 
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Accept": "application/vnd.github.v3+json",
-        "X-GitHub-Api-Version": "2022-11-28",
-    }
+    if create_repo_response.status_code == 404:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Template repository '{template_repo}' not found or not marked as a template. "
+            "Please ensure the template repo exists and is marked as a template in GitHub settings.",
+        )
+    elif create_repo_response.status_code != 201:
+        error_data = parse_github_json(create_repo_response)
+        error_detail = error_data.get("message", "Unknown error")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to create repository from template: {error_detail}",
+        )
 
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        # Step 1: Create a new repo from the template in the user's account
-        unique_suffix = secrets.token_hex(4)
-        new_repo_name = f"llmeetcode-{problem_id}-{unique_suffix}"
-
-        # Create repo from template
-        create_repo_response = await client.post(
-            f"https://api.github.com/repos/{template_repo}/generate",
-            json={
-                "owner": username,
-                "name": new_repo_name,
-                "private": True,
-                "description": f"LLMeetCode interview problem: {problem.title}",
-            },
+    new_repo_data = parse_github_json(create_repo_response)
+    new_repo_full_name = new_repo_data["full_name"]
+    repository_id = new_repo_data["id"]
+    default_branch = new_repo_data.get("default_branch", "main")
+
+    # Wait for the repo to be fully initialized by polling for the branch.
+    # Check right away, then back off exponentially so quickly generated repos
+    # are picked up early without hammering the API while slower ones finish.
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + BRANCH_POLL_TIMEOUT
+    delay = BRANCH_POLL_INITIAL_DELAY
+    while True:
+        # Check if the branch exists; only the status code matters, so skip
+        # downloading the branch payload
+        branch_response = await client.head(
+            f"/repos/{new_repo_full_name}/branches/{default_branch}",
             headers=headers,
+            timeout=CODESPACE_REQUEST_TIMEOUT,
         )
-
-        if create_repo_response.status_code == 404:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Template repository '{template_repo}' not found or not marked as a template. "
-                "Please ensure the template repo exists and is marked as a template in GitHub settings.",
+        if branch_response.status_code == 200:
+            break
+        if loop.time() + delay >= deadline:
+            # Clean up the repo if we can't verify it's ready
+            await client.delete(
+                f"/repos/{new_repo_full_name}",
+                headers=headers,
+                timeout=CODESPACE_REQUEST_TIMEOUT,
             )
-        elif create_repo_response.status_code != 201:
-            error_data = create_repo_response.json()
-            error_detail = error_data.get("message", "Unknown error")
             raise HTTPException(
                 status_code=500,
-                detail=f"Failed to create repository from template: {error_detail}",
-            )
-
-        new_repo_data = create_repo_response.json()
-        new_repo_full_name = new_repo_data["full_name"]
-        repository_id = new_repo_data["id"]
-        default_branch = new_repo_data.get("default_branch", "main")
-
-        # Wait for the repo to be fully initialized by polling for the branch
-        import asyncio
-
-        max_retries = 10
-        for attempt in range(max_retries):
-            await asyncio.sleep(2)
-            # Check if the branch exists
-            branch_response = await client.get(
-                f"https://api.github.com/repos/{new_repo_full_name}/branches/{default_branch}",
-                headers=headers,
+                detail="Repository created but branch not available. Please try again.",
             )
-            if branch_response.status_code == 200:
-                break
-            if attempt == max_retries - 1:
-                # Clean up the repo if we can't verify it's ready
-                await client.delete(
-                    f"https://api.github.com/repos/{new_repo_full_name}",
-                    headers=headers,
-                )
-                raise HTTPException(
-                    status_code=500,
-                    detail="Repository created but branch not available. Please try again.",
-                )
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, BRANCH_POLL_MAX_DELAY)
 
-        # Step 2: Create config file with completion token BEFORE creating codespace
-        # This ensures the token is available when the codespace container starts
-        completion_token = secrets.token_urlsafe(32)
-        token_expires_at = datetime.now(UTC) + timedelta(days=7)  # 7 day expiry
+    # Step 2: Create config file with completion token BEFORE creating codespace
+    # This ensures the token is available when the codespace container starts
+    completion_token = secrets.token_urlsafe(32)
+    token_expires_at = datetime.now(UTC) + timedelta(days=7)  # 7 day expiry
 
-        # Create the config file content
-        config_content = f"""# LLMeetCode Configuration
+    # Create the config file content
+    config_content = f"""# LLMeetCode Configuration
 # This file was auto-generated when the codespace was created.
 # DO NOT EDIT or share this file - it contains your authentication token.
 
@@ -510,87 +896,103 @@ LLMEETCODE_TOKEN={completion_token}
 LLMEETCODE_PROBLEM_ID={problem_id}
 LLMEETCODE_API_URL={API_BASE_URL}
 """
-        # Base64 encode the content for GitHub Contents API
-        import base64
-
-        config_content_b64 = base64.b64encode(config_content.encode()).decode()
-
-        # Create the .llmeetcode-config file in the repo
-        config_response = await client.put(
-            f"https://api.github.com/repos/{new_repo_full_name}/contents/.llmeetcode-config",
-            json={
-                "message": "Add LLMeetCode configuration",
-                "content": config_content_b64,
-                "branch": default_branch,
-            },
-            headers=headers,
-        )
-
-        if config_response.status_code not in (200, 201):
-            # Log warning but continue - the codespace can still be created
-            print(
-                f"Warning: Failed to create .llmeetcode-config: "
-                f"{config_response.status_code} {config_response.text}"
-            )
+    # Base64 encode the content for GitHub Contents API
+    config_content_b64 = base64.b64encode(config_content.encode()).decode()
+
+    # Step 3: Create the .llmeetcode-config file and, unless the template's
+    # machine type is cached, look up available machine types concurrently -
+    # both only depend on the new repo existing
+    config_request = client.put(
+        f"/repos/{new_repo_full_name}/contents/.llmeetcode-config",
+        json={
+            "message": "Add LLMeetCode configuration",
+            "content": config_content_b64,
+            "branch": default_branch,
+        },
+        headers=headers,
+        timeout=CODESPACE_REQUEST_TIMEOUT,
+    )
 
-        # Step 3: Get available machine types for the new repository
-        machines_response = await client.get(
-            f"https://api.github.com/repos/{new_repo_full_name}/codespaces/machines",
-            headers=headers,
+    cached_machine_type = get_cached_machine_type(template_repo, user_id)
+    if cached_machine_type is not None:
+        config_response = await config_request
+        machine_type = cached_machine_type
+    else:
+        config_response, machines_response = await asyncio.gather(
+            config_request,
+            client.get(
+                f"/repos/{new_repo_full_name}/codespaces/machines",
+                headers=headers,
+                timeout=CODESPACE_REQUEST_TIMEOUT,
+            ),
         )
 
-        machine_type = "basicLinux32gb"  # Default to a known valid machine type
+        machine_type = DEFAULT_MACHINE_TYPE  # Default to a known valid machine type
 
         if machines_response.status_code == 200:
-            machines = machines_response.json()
+            machines = parse_github_json(machines_response)
             if machines and "machines" in machines and len(machines["machines"]) > 0:
                 machine_type = machines["machines"][0]["name"]
+                cache_machine_type(template_repo, user_id, machine_type)
+
+    if config_response.status_code not in (200, 201):
+        # Log warning but continue - the codespace can still be created
+        logger.warning(
+            "Failed to create .llmeetcode-config: %s %s",
+            config_response.status_code,
+            config_response.text,
+        )
 
-        # Step 4: Create the codespace from the new repo
-        display_name = f"llmeetcode-{problem_id}-{unique_suffix}"
-        codespace_data = {
-            "repository_id": repository_id,
-            "ref": default_branch,
-            "location": "WestUs2",
-            "machine": machine_type,
-            "devcontainer_path": ".devcontainer/devcontainer.json",
-            "display_name": display_name,
-            "idle_timeout_minutes": 30,
-        }
+    # Step 4: Create the codespace from the new repo
+    codespace_data = {
+        "repository_id": repository_id,
+        "ref": default_branch,
+        "location": "WestUs2",
+        "machine": machine_type,
+        "devcontainer_path": ".devcontainer/devcontainer.json",
+        "display_name": new_repo_name,
+        "idle_timeout_minutes": 30,
+    }
+
+    response = await client.post(
+        "/user/codespaces",
+        json=codespace_data,
+        headers=headers,
+        timeout=CODESPACE_REQUEST_TIMEOUT,
+    )
 
-        response = await client.post(
-            "https://api.github.com/user/codespaces",
-            json=codespace_data,
+    if response.status_code != 201:
+        # If codespace creation fails, try to clean up the repo we created
+        await client.delete(
+            f"/repos/{new_repo_full_name}",
             headers=headers,
+            timeout=CODESPACE_REQUEST_TIMEOUT,
+        )
+        error_data = parse_github_json(response)
+        logger.warning("GitHub API error creating codespace: %s", error_data)
+        error_detail = error_data.get("message", "Unknown error")
+        raise HTTPException(
+            status_code=500, detail=f"Failed to create codespace: {error_detail}"
         )
 
-        if response.status_code != 201:
-            # If codespace creation fails, try to clean up the repo we created
-            await client.delete(
-                f"https://api.github.com/repos/{new_repo_full_name}",
-                headers=headers,
-            )
-            error_data = response.json()
-            print(f"GitHub API Error Response: {error_data}")
-            error_detail = error_data.get("message", "Unknown error")
-            raise HTTPException(
-                status_code=500, detail=f"Failed to create codespace: {error_detail}"
-            )
-
-        codespace = response.json()
+    codespace = parse_github_json(response)
 
-        # Step 5: Store token in database (token was already generated before codespace creation)
-        codespace_token = CodespaceToken(
-            token=completion_token,
+    # Step 5: Store token in database (token was already generated before codespace creation)
+    # Nothing reads these rows back here, so plain Core inserts skip building
+    # and tracking ORM instances
+    db.execute(
+        insert(CodespaceToken).values(
+            token_hash=hash_codespace_token(completion_token),
             user_id=user_id,
             problem_id=problem_id,
             codespace_name=codespace["name"],
             expires_at=token_expires_at,
         )
-        db.add(codespace_token)
+    )
 
-        # Step 6: Track the repo in the database for cleanup later
-        user_repo = UserRepo(
+    # Step 6: Track the repo in the database for cleanup later
+    db.execute(
+        insert(UserRepo).values(
             user_id=user_id,
             github_username=username,
             repo_name=new_repo_name,
@@ -598,19 +1000,87 @@ LLMEETCODE_API_URL={API_BASE_URL}
             problem_id=problem_id,
             template_repo=template_repo,
         )
-        db.add(user_repo)
-        db.commit()
+    )
+    db.commit()
 
-        # Return the codespace info
-        return {
-            "name": codespace["name"],
-            "web_url": codespace.get(
-                "web_url", f"https://github.com/codespaces/{codespace['name']}"
-            ),
-            "state": codespace.get("state", "Unknown"),
-            "created_at": codespace.get("created_at"),
-            "repo_name": new_repo_full_name,
-        }
+    # Return the codespace info
+    return {
+        "name": codespace["name"],
+        "web_url": codespace.get(
+            "web_url", f"https://github.com/codespaces/{codespace['name']}"
+        ),
+        "state": codespace.get("state", "Unknown"),
+        "created_at": codespace.get("created_at"),
+        "repo_name": new_repo_full_name,
+    }
+
+
+async def create_codespace_throttled(
+    access_token: str, problem_id: str, username: str, user_id: int, db: Session
+) -> dict:
+    """Run create_codespace once a GitHub concurrency slot is free."""
+    async with _codespace_creation_semaphore:
+        return await create_codespace(
+            access_token=access_token,
+            problem_id=problem_id,
+            username=username,
+            user_id=user_id,
+            db=db,
+        )
+
+
+def codespace_listing_key(access_token: str) -> str:
+    """Key listings by a digest so raw OAuth tokens are not held in memory."""
+    return hashlib.sha256(access_token.encode()).hexdigest()
+
+
+def cache_codespace_listing(key: str, etag: str, codespaces: list[dict]) -> None:
+    _codespace_list_etags.pop(key, None)
+    _codespace_list_etags[key] = (etag, codespaces)
+    # Evict the least recently stored listing once the cache is full
+    if len(_codespace_list_etags) > CODESPACE_LIST_ETAG_CACHE_SIZE:
+        del _codespace_list_etags[next(iter(_codespace_list_etags))]
+
+
+def extract_llmeetcode_codespaces(codespaces: list[dict]) -> list[dict]:
+    """Reduce GitHub's codespace objects to llmeetcode ones, most recent first."""
+    llmeetcode_codespaces: list[tuple[str, dict]] = []
+    for cs in codespaces:
+        display_name = cs.get("display_name", "")
+        if not display_name.startswith(CODESPACE_NAME_PREFIX):
+            continue
+
+        # Extract problem_id from display_name: "llmeetcode-{problem_id}-{8_char_hex}"
+        # by dropping the prefix and the final hex segment; rpartition avoids
+        # splitting the whole name into a list
+        name_body = display_name.removeprefix(CODESPACE_NAME_PREFIX)
+        extracted_problem_id, _, _ = name_body.rpartition("-")
+
+        created_at = cs.get("created_at")
+        last_used_at = cs.get("last_used_at")
+        # Sort by last_used_at descending, fall back to created_at; the key is
+        # computed here once so the sort itself needs no Python callback
+        sort_key = last_used_at or created_at or ""
+        llmeetcode_codespaces.append(
+            (
+                sort_key,
+                {
+                    "name": cs["name"],
+                    "web_url": cs.get(
+                        "web_url", f"https://github.com/codespaces/{cs['name']}"
+                    ),
+                    "state": cs.get("state", "Unknown"),
+                    "display_name": display_name,
+                    "created_at": created_at,
+                    "last_used_at": last_used_at,
+                    "problem_id": extracted_problem_id,
+                },
+            )
+        )
+
+    llmeetcode_codespaces.sort(key=itemgetter(0), reverse=True)
+
+    return [codespace for _, codespace in llmeetcode_codespaces]
 
 
 async def list_user_codespaces(
@@ -626,64 +1096,98 @@ async def list_user_codespaces(
         List of codespace dicts with: name, web_url, state, display_name,
         created_at, last_used_at, problem_id (extracted from display_name)
     """
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Accept": "application/vnd.github.v3+json",
-        "X-GitHub-Api-Version": "2022-11-28",
-    }
+    headers = github_auth_headers(access_token)
+    # Revalidate the last listing for this token; a 304 has no body to download
+    listing_key = codespace_listing_key(access_token)
+    cached_listing = _codespace_list_etags.get(listing_key)
+    if cached_listing is not None:
+        headers["If-None-Match"] = cached_listing[0]
+
+    client = get_http_client()
+    response = await client.get(
+        "/user/codespaces",
+        headers=headers,
+    )
 
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            "https://api.github.com/user/codespaces",
-            headers=headers,
+    if response.status_code == 304 and cached_listing is not None:
+        codespaces = cached_listing[1]
+    elif response.status_code != 200:
+        raise HTTPException(
+            status_code=response.status_code,
+            detail=f"Failed to list codespaces: {parse_github_json(response).get('message', 'Unknown error')}",
         )
+    else:
+        data = parse_github_json(response)
+        codespaces = extract_llmeetcode_codespaces(data.get("codespaces", []))
+        etag = response.headers.get("ETag")
+        if etag:
+            cache_codespace_listing(listing_key, etag, codespaces)
 
-        if response.status_code != 200:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=f"Failed to list codespaces: {response.json().get('message', 'Unknown error')}",
-            )
+    # Copies keep callers from mutating the revalidation cache
+    return [
+        dict(cs)
+        for cs in codespaces
+        if not problem_id or cs["problem_id"] == problem_id
+    ]
 
-        data = response.json()
-        codespaces = data.get("codespaces", [])
 
-        # Filter to only llmeetcode codespaces
-        llmeetcode_codespaces = []
-        for cs in codespaces:
-            display_name = cs.get("display_name", "")
-            if not display_name.startswith("llmeetcode-"):
-                continue
+async def list_user_codespaces_cached(
+    user_id: int, access_token: str, problem_id: str | None = None
+) -> list[dict]:
+    """List a user's llmeetcode codespaces, reusing a recent listing if fresh.
 
-            # Extract problem_id from display_name: "llmeetcode-{problem_id}-{8_char_hex}"
-            parts = display_name.split("-")
-            # parts[0] = "llmeetcode", parts[1:-1] = problem_id parts, parts[-1] = hex
-            extracted_problem_id = "-".join(parts[1:-1]) if len(parts) > 2 else ""
+    Used by page renders, where a listing up to CODESPACE_LIST_CACHE_TTL old is
+    acceptable. Returns copies so callers may annotate entries freely.
+    """
+    entry = _codespace_list_cache.get(user_id)
+    if entry is not None and time.monotonic() - entry[0] <= CODESPACE_LIST_CACHE_TTL:
+        codespaces = entry[1]
+    else:
+        codespaces = await list_user_codespaces(access_token)
+        cache_user_codespace_listing(user_id, codespaces)
 
-            # Filter by problem_id if provided
-            if problem_id and extracted_problem_id != problem_id:
-                continue
+    return [
+        dict(cs)
+        for cs in codespaces
+        if not problem_id or cs["problem_id"] == problem_id
+    ]
 
-            llmeetcode_codespaces.append(
-                {
-                    "name": cs["name"],
-                    "web_url": cs.get(
-                        "web_url", f"https://github.com/codespaces/{cs['name']}"
-                    ),
-                    "state": cs.get("state", "Unknown"),
-                    "display_name": display_name,
-                    "created_at": cs.get("created_at"),
-                    "last_used_at": cs.get("last_used_at"),
-                    "problem_id": extracted_problem_id,
-                }
-            )
 
-        # Sort by last_used_at descending, fall back to created_at
-        llmeetcode_codespaces.sort(
-            key=lambda x: x.get("last_used_at") or x.get("created_at") or "",
-            reverse=True,
-        )
+async def list_user_codespaces_for_page(
+    user_id: int, access_token: str | None
+) -> list[dict]:
+    """Cached codespace listing for page renders; empty if it cannot be fetched.
+
+    Pages still render without codespaces when GitHub is unavailable, so this
+    can run alongside database work without its failure cancelling that work.
+    """
+    if not access_token:
+        return []
+    try:
+        return await list_user_codespaces_cached(user_id, access_token)
+    except Exception:
+        return []
+
+
+def cache_user_codespace_listing(user_id: int, codespaces: list[dict]) -> None:
+    now = time.monotonic()
+    _codespace_list_cache.pop(user_id, None)
+    _codespace_list_cache[user_id] = (now, codespaces)
+    # Entries are kept in write order, so expired ones sit at the front; drop
+    # them, and the oldest entry once the cache is full
+    while True:
+        oldest_user_id = next(iter(_codespace_list_cache))
+        oldest_cached_at = _codespace_list_cache[oldest_user_id][0]
+        if (
+            now - oldest_cached_at <= CODESPACE_LIST_CACHE_TTL
+            and len(_codespace_list_cache) <= CODESPACE_LIST_CACHE_SIZE
+        ):
+            break
+        del _codespace_list_cache[oldest_user_id]
 
-        return llmeetcode_codespaces
+
+def invalidate_codespace_list_cache(user_id: int) -> None:
+    _codespace_list_cache.pop(user_id, None)
 
 
 async def delete_codespace(access_token: str, codespace_name: str) -> bool:
@@ -699,32 +1203,28 @@ async def delete_codespace(access_token: str, codespace_name: str) -> bool:
     Raises:
         HTTPException: If deletion fails
     """
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Accept": "application/vnd.github.v3+json",
-        "X-GitHub-Api-Version": "2022-11-28",
-    }
+    headers = github_auth_headers(access_token)
 
-    async with httpx.AsyncClient() as client:
-        response = await client.delete(
-            f"https://api.github.com/user/codespaces/{codespace_name}",
-            headers=headers,
-        )
+    client = get_http_client()
+    response = await client.delete(
+        f"/user/codespaces/{codespace_name}",
+        headers=headers,
+    )
 
-        if response.status_code == 202:
-            # 202 Accepted means deletion is in progress
-            return True
-        elif response.status_code == 404:
-            raise HTTPException(
-                status_code=404,
-                detail="Codespace not found",
-            )
-        else:
-            error_msg = response.json().get("message", "Unknown error")
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=f"Failed to delete codespace: {error_msg}",
-            )
+    if response.status_code == 202:
+        # 202 Accepted means deletion is in progress
+        return True
+    elif response.status_code == 404:
+        raise HTTPException(
+            status_code=404,
+            detail="Codespace not found",
+        )
+    else:
+        error_msg = parse_github_json(response).get("message", "Unknown error")
+        raise HTTPException(
+            status_code=response.status_code,
+            detail=f"Failed to delete codespace: {error_msg}",
+        )
 
 
 async def delete_user_repo(
@@ -743,29 +1243,51 @@ async def delete_user_repo(
     Raises:
         HTTPException: If deletion fails for reasons other than 404
     """
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Accept": "application/vnd.github.v3+json",
-        "X-GitHub-Api-Version": "2022-11-28",
-    }
+    headers = github_auth_headers(access_token)
 
     repo_full_name = f"{github_username}/{repo_name}"
 
-    async with httpx.AsyncClient() as client:
-        response = await client.delete(
-            f"https://api.github.com/repos/{repo_full_name}",
-            headers=headers,
+    client = get_http_client()
+    response = await client.delete(
+        f"/repos/{repo_full_name}",
+        headers=headers,
+    )
+
+    if response.status_code in (204, 404):
+        # 204 = deleted successfully, 404 = already gone
+        return True
+    else:
+        error_msg = parse_github_json(response).get("message", "Unknown error")
+        raise HTTPException(
+            status_code=response.status_code,
+            detail=f"Failed to delete repository: {error_msg}",
         )
 
-        if response.status_code in (204, 404):
-            # 204 = deleted successfully, 404 = already gone
-            return True
-        else:
-            error_msg = response.json().get("message", "Unknown error")
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=f"Failed to delete repository: {error_msg}",
-            )
+
+# Anonymous renders depend only on the catalog, the query parameters and the
+# deployed templates, so they can be revalidated without rendering. Render
+# sets RENDER_GIT_COMMIT per deploy; elsewhere the salt is derived from the
+# template sources so every worker issues the same ETags.
+ANONYMOUS_HOME_CACHE_CONTROL = "public, max-age=60"
+
+
+def template_digest() -> str:
+    """Digest of every template's name and source."""
+    env = templates.env
+    digest = hashlib.blake2b(digest_size=16)
+    for name in sorted(env.list_templates()):
+        source, _, _ = env.loader.get_source(env, name)
+        digest.update(name.encode())
+        digest.update(source.encode())
+    return digest.hexdigest()
+
+
+HOME_ETAG_SALT = os.getenv("RENDER_GIT_COMMIT") or template_digest()
+
+
+def anonymous_home_etag(catalog: ProblemCatalog, *params: str | None) -> str:
+    key = "|".join([HOME_ETAG_SALT, catalog.fingerprint, *(p or "" for p in params)])
+    return f'"{hashlib.blake2b(key.encode(), digest_size=16).hexdigest()}"'
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -778,60 +1300,76 @@ async def home(
 ):
     """Main page listing coding problems"""
     session = get_session_data(request)
+    catalog = get_active_problem_catalog(db)
+
+    anonymous_etag = None
+    if not session:
+        anonymous_etag = anonymous_home_etag(
+            catalog, difficulty, language, deleted_problem_id
+        )
+        if etag_matches(request, anonymous_etag):
+            return Response(
+                status_code=304,
+                headers={
+                    "ETag": anonymous_etag,
+                    "Cache-Control": ANONYMOUS_HOME_CACHE_CONTROL,
+                    "Vary": "Cookie",
+                },
+            )
 
     # Get user's hide_completed preference from database
     hide_completed_bool: bool = False
     completed_ids: set[str] = set()
     active_codespaces: dict[str, str] = {}  # Maps problem_id -> codespace web_url
     if session and "user_id" in session:
-        user = get_authenticated_user(session, db)
+        # Load the user's preference and completed ids in a single round trip,
+        # overlapping it with the (usually cached) codespace listing
+        user, codespaces = await asyncio.gather(
+            run_in_threadpool(
+                db.get,
+                User,
+                session["user_id"],
+                options=[
+                    joinedload(User.completed_problems).load_only(
+                        CompletedProblem.problem_id
+                    )
+                ],
+            ),
+            list_user_codespaces_for_page(
+                session["user_id"], session.get("access_token")
+            ),
+        )
         if user is not None:
             hide_completed_bool = bool(getattr(user, "hide_completed", False))
+            completed_ids = {
+                str(completion.problem_id) for completion in user.completed_problems
+            }
 
-        completed = (
-            db.query(CompletedProblem)
-            .filter(CompletedProblem.user_id == session["user_id"])
-            .all()
-        )
-        completed_ids = set()
-        for completion_record in completed:
-            completed_ids.add(str(completion_record.problem_id))
-
-        # Get active codespaces for this user
-        if session.get("access_token"):
-            try:
-                codespaces = await list_user_codespaces(session["access_token"])
-                active_codespaces = {
-                    cs["problem_id"]: cs["web_url"] for cs in codespaces
-                }
-            except Exception:
-                # If fetching codespaces fails, continue without them
-                pass
-
-    # Get all active problems from database
-    problems_query = db.query(Problem).filter(Problem.is_active.is_(True))
+        active_codespaces = {cs["problem_id"]: cs["web_url"] for cs in codespaces}
 
-    # Apply filters
+    # Get all active problems and apply filters by intersecting the catalog's
+    # precomputed id sets, then hide completed problems if requested
+    selected_ids: frozenset[str] | None = None
     if difficulty and difficulty != "All Difficulties":
-        problems_query = problems_query.filter(Problem.difficulty == difficulty)
+        selected_ids = catalog.ids_by_difficulty.get(difficulty, frozenset())
 
     if language and language != "All Languages":
-        problems_query = problems_query.filter(Problem.language == language)
-
-    all_problems = problems_query.all()
+        language_ids = catalog.ids_by_language.get(language, frozenset())
+        selected_ids = (
+            language_ids if selected_ids is None else selected_ids & language_ids
+        )
 
-    # Convert to dict format for template compatibility
-    filtered_problems = [
-        {
-            "id": p.id,
-            "title": p.title,
-            "description": p.description,
-            "difficulty": p.difficulty,
-            "language": p.language,
-            "template_repo": p.template_repo,
-        }
-        for p in all_problems
-    ]
+    hidden_ids = completed_ids if hide_completed_bool else set()
+    if selected_ids is None and not hidden_ids:
+        # Unfiltered listing, the common case: no per-problem checks needed
+        filtered_problems = list(catalog.by_id.values())
+    else:
+        filtered_problems = [
+            p
+            for problem_id, p in catalog.by_id.items()
+            if (selected_ids is None or problem_id in selected_ids)
+            and problem_id not in hidden_ids
+        ]
 
     inactive_problems: list[dict[str, str]] = []
     if session and "user_id" in session:
@@ -844,24 +1382,22 @@ async def home(
                 "language": cast(str, p.language),
             }
             for p in db.query(Problem)
+            .options(
+                load_only(
+                    Problem.id,
+                    Problem.title,
+                    Problem.difficulty,
+                    Problem.language,
+                    Problem.creator_user_id,
+                )
+            )
             .filter(Problem.is_active.is_(False))
             .order_by(Problem.updated_at.desc(), Problem.created_at.desc())
             .all()
             if can_manage_problem(current_user, p)
         ]
 
-    # Hide completed problems if requested
-    if hide_completed_bool and len(completed_ids) > 0:
-        filtered_problems = [
-            p for p in filtered_problems if p["id"] not in completed_ids
-        ]
-
-    # Get unique values for filter options from all active problems
-    all_active_problems = db.query(Problem).filter(Problem.is_active.is_(True)).all()
-    all_difficulties = sorted({p.difficulty for p in all_active_problems})
-    all_languages = sorted({p.language for p in all_active_problems})
-
-    return templates.TemplateResponse(
+    response = templates.TemplateResponse(
         "index.html",
         {
             "request": request,
@@ -873,8 +1409,8 @@ async def home(
             "hide_completed": "true" if bool(hide_completed_bool) else "false",
             "selected_difficulty": difficulty or "All Difficulties",
             "selected_language": language or "All Languages",
-            "all_difficulties": all_difficulties,
-            "all_languages": all_languages,
+            "all_difficulties": catalog.difficulties,
+            "all_languages": catalog.languages,
             "inactive_problems": inactive_problems,
             "delete_success_message": (
                 f"Problem '{deleted_problem_id}' was deleted permanently. GitHub repos and codespaces were not cleaned up."
@@ -883,6 +1419,32 @@ async def home(
             ),
         },
     )
+    if anonymous_etag is not None:
+        response.headers["ETag"] = anonymous_etag
+        response.headers["Cache-Control"] = ANONYMOUS_HOME_CACHE_CONTROL
+        response.headers["Vary"] = "Cookie"
+        return response
+    return with_etag(request, response)
+
+
+PROBLEMS_API_CACHE_CONTROL = "public, max-age=300"
+
+
+@app.get("/api/problems")
+def list_problems_api(request: Request, db: Session = Depends(get_db)):
+    """List active problems as JSON.
+
+    The catalog is the same for every visitor, so the body and its ETag are
+    built once per catalog snapshot and handed back as raw bytes that shared
+    caches may reuse.
+    """
+    catalog = get_active_problem_catalog(db)
+    headers = {"ETag": catalog.api_etag, "Cache-Control": PROBLEMS_API_CACHE_CONTROL}
+    if etag_matches(request, catalog.api_etag):
+        return Response(status_code=304, headers=headers)
+    return Response(
+        content=catalog.api_body, media_type="application/json", headers=headers
+    )
 
 
 @app.get("/problems/new", response_class=HTMLResponse)
@@ -908,7 +1470,7 @@ async def add_problem_page(request: Request, created_problem_id: str | None = No
 
 
 @app.get("/problems/{problem_id}/edit", response_class=HTMLResponse)
-async def edit_problem_page(
+def edit_problem_page(
     problem_id: str,
     request: Request,
     db: Session = Depends(get_db),
@@ -989,6 +1551,7 @@ async def create_problem(
     )
 
     db.commit()
+    invalidate_problem_catalog()
 
     if form_data["is_active"] == "true":
         return RedirectResponse(
@@ -1054,6 +1617,7 @@ async def update_problem(
         normalized_youtube_url,
     )
     db.commit()
+    invalidate_problem_catalog()
 
     if problem_row.is_active:
         return RedirectResponse(
@@ -1067,7 +1631,7 @@ async def update_problem(
 
 
 @app.get("/problems/{problem_id}/delete", response_class=HTMLResponse)
-async def delete_problem_confirmation_page(
+def delete_problem_confirmation_page(
     problem_id: str,
     request: Request,
     db: Session = Depends(get_db),
@@ -1100,7 +1664,7 @@ async def delete_problem_confirmation_page(
 
 
 @app.post("/problems/{problem_id}/delete")
-async def delete_problem(
+def delete_problem(
     problem_id: str,
     request: Request,
     db: Session = Depends(get_db),
@@ -1118,6 +1682,7 @@ async def delete_problem(
 
     delete_problem_and_dependencies(db, problem_id)
     db.commit()
+    invalidate_problem_catalog()
 
     return RedirectResponse(url=f"/?deleted_problem_id={problem_id}", status_code=303)
 
@@ -1180,13 +1745,7 @@ async def problem_detail(
 @app.get("/auth/login")
 async def login():
     """Redirect to GitHub OAuth"""
-    auth_url = (
-        f"https://github.com/login/oauth/authorize?"
-        f"client_id={GITHUB_CLIENT_ID}&"
-        f"redirect_uri={GITHUB_REDIRECT_URI}&"
-        f"scope=codespace user:email repo delete_repo"
-    )
-    return RedirectResponse(auth_url, status_code=302)
+    return RedirectResponse(GITHUB_AUTHORIZE_URL, status_code=302)
 
 
 @app.get("/auth/callback")
@@ -1194,39 +1753,36 @@ async def auth_callback(code: str, db: Session = Depends(get_db)):
     """Handle GitHub OAuth callback"""
 
     # Exchange code for access token
-    async with httpx.AsyncClient() as client:
-        token_response = await client.post(
-            "https://github.com/login/oauth/access_token",
-            data={
-                "client_id": GITHUB_CLIENT_ID,
-                "client_secret": GITHUB_CLIENT_SECRET,
-                "code": code,
-            },
-            headers={"Accept": "application/json"},
-        )
+    client = get_http_client()
+    token_response = await client.post(
+        "https://github.com/login/oauth/access_token",
+        data={
+            "client_id": GITHUB_CLIENT_ID,
+            "client_secret": GITHUB_CLIENT_SECRET,
+            "code": code,
+        },
+        headers=GITHUB_OAUTH_TOKEN_HEADERS,
+    )
 
-        if token_response.status_code != 200:
-            raise HTTPException(status_code=400, detail="Failed to get access token")
+    if token_response.status_code != 200:
+        raise HTTPException(status_code=400, detail="Failed to get access token")
 
-        token_data = token_response.json()
-        access_token = token_data.get("access_token")
+    token_data = parse_github_json(token_response)
+    access_token = token_data.get("access_token")
 
-        if not access_token:
-            raise HTTPException(status_code=400, detail="No access token received")
+    if not access_token:
+        raise HTTPException(status_code=400, detail="No access token received")
 
-        # Get user info
-        user_response = await client.get(
-            "https://api.github.com/user",
-            headers={
-                "Authorization": f"Bearer {access_token}",
-                "Accept": "application/vnd.github.v3+json",
-            },
-        )
+    # Get user info
+    user_response = await client.get(
+        "/user",
+        headers=github_auth_headers(access_token),
+    )
 
-        if user_response.status_code != 200:
-            raise HTTPException(status_code=400, detail="Failed to get user info")
+    if user_response.status_code != 200:
+        raise HTTPException(status_code=400, detail="Failed to get user info")
 
-        user_data = user_response.json()
+    user_data = parse_github_json(user_response)
 
     # Create or update user in database
     github_id = user_data["id"]
@@ -1247,13 +1803,16 @@ async def auth_callback(code: str, db: Session = Depends(get_db)):
         )
         db.add(db_user)
 
+    # Flush to assign the primary key, then read it before commit expires the
+    # instance; this avoids a refresh round trip just to learn the id
+    db.flush()
+    user_id = db_user.id
     db.commit()
-    db.refresh(db_user)
 
     # Create session
     session_data = {
         "access_token": access_token,
-        "user_id": db_user.id,
+        "user_id": user_id,
         "user": {
             "login": user_data["login"],
             "name": user_data.get("name"),
@@ -1261,16 +1820,12 @@ async def auth_callback(code: str, db: Session = Depends(get_db)):
         },
     }
 
-    session_token = cast(str, serializer.dumps(session_data))
+    session_token = serializer.dumps(session_data)
 
     response = RedirectResponse(url="/", status_code=302)
-    response.set_cookie(
-        "session",
-        session_token,
-        max_age=3600,
-        httponly=True,
-        secure=False,  # Set to True in production with HTTPS
-        samesite="lax",
+    # Tokens are unpadded base64url, which is safe in a cookie value unquoted
+    response.raw_headers.append(
+        (b"set-cookie", SESSION_COOKIE_TEMPLATE.format(token=session_token).encode())
     )
 
     return response
@@ -1297,15 +1852,30 @@ async def create_codespace_endpoint(
     if not username:
         raise HTTPException(status_code=401, detail="Session missing GitHub username")
 
+    # A double-submitted request joins the creation already in flight instead
+    # of provisioning a second repo and codespace
+    inflight_key = (session["user_id"], request.problem_id)
     try:
-        codespace_info = await create_codespace(
-            access_token=session["access_token"],
-            problem_id=request.problem_id,
-            username=username,
-            user_id=session["user_id"],
-            db=db,
+        inflight = _inflight_codespace_creations.get(inflight_key)
+        if inflight is not None:
+            # Shield so this duplicate disconnecting doesn't cancel the original
+            return await asyncio.shield(inflight)
+
+        creation = asyncio.create_task(
+            create_codespace_throttled(
+                access_token=session["access_token"],
+                problem_id=request.problem_id,
+                username=username,
+                user_id=session["user_id"],
+                db=db,
+            )
         )
-        return codespace_info
+        _inflight_codespace_creations[inflight_key] = creation
+        try:
+            return await creation
+        finally:
+            _inflight_codespace_creations.pop(inflight_key, None)
+            invalidate_codespace_list_cache(session["user_id"])
     except HTTPException:
         raise
     except Exception as e:
@@ -1367,6 +1937,8 @@ async def delete_codespace_endpoint(
 
     # First, delete the codespace
     await delete_codespace(access_token, codespace_name)
+    if "user_id" in session:
+        invalidate_codespace_list_cache(session["user_id"])
 
     # Then, find and delete the associated repo
     user_repo = (
@@ -1382,18 +1954,30 @@ async def delete_codespace_endpoint(
             )
         except HTTPException as e:
             # Log but don't fail if repo deletion fails
-            print(f"Warning: Failed to delete repo {user_repo.repo_name}: {e.detail}")
+            logger.warning(
+                "Failed to delete repo %s: %s", user_repo.repo_name, e.detail
+            )
 
         # Remove from database regardless
         db.delete(user_repo)
         db.commit()
 
-    return JSONResponse({"status": "deleted", "repo_deleted": user_repo is not None})
+    return {"status": "deleted", "repo_deleted": user_repo is not None}
 
 
 @app.get("/auth/logout")
-async def logout():
+async def logout(request: Request):
     """Clear session and logout"""
+    session = get_session_data(request)
+    if session:
+        # Cached codespace listings belong to this session's token and user
+        if session.get("access_token"):
+            _codespace_list_etags.pop(
+                codespace_listing_key(session["access_token"]), None
+            )
+        if "user_id" in session:
+            _codespace_list_cache.pop(session["user_id"], None)
+
     response = RedirectResponse(url="/", status_code=302)
     response.delete_cookie("session")
     return response
@@ -1409,18 +1993,34 @@ async def dashboard(request: Request, db: Session = Depends(get_db)):
 
     user_id = session["user_id"]
 
-    # Get completed problems for this user
-    completed = (
-        db.query(CompletedProblem)
+    # Get completed problems for this user (only the id and timestamp are
+    # used) while the active codespaces are listed
+    completed_query = (
+        db.query(CompletedProblem.problem_id, CompletedProblem.completed_at)
         .filter(CompletedProblem.user_id == user_id)
         .order_by(CompletedProblem.completed_at.desc())
-        .all()
     )
+    completed, codespaces = await asyncio.gather(
+        run_in_threadpool(completed_query.all),
+        list_user_codespaces_for_page(user_id, session.get("access_token")),
+    )
+
+    # Load every referenced problem in one query instead of one per row
+    referenced_ids = {cp.problem_id for cp in completed} | {
+        cs["problem_id"] for cs in codespaces
+    }
+    referenced_problems = (
+        db.query(Problem)
+        .options(load_only(Problem.id, Problem.title, Problem.difficulty))
+        .filter(Problem.id.in_(referenced_ids))
+    )
+    problems_by_id = {problem.id: problem for problem in referenced_problems}
 
-    # Match with problem details from database
+    # Match with problem details from database, counting difficulties as we go
     completed_problems = []
+    difficulty_counts = {"Easy": 0, "Medium": 0, "Hard": 0}
     for cp in completed:
-        problem = db.query(Problem).filter(Problem.id == cp.problem_id).first()
+        problem = problems_by_id.get(cp.problem_id)
         if problem:
             completed_problems.append(
                 {
@@ -1430,32 +2030,24 @@ async def dashboard(request: Request, db: Session = Depends(get_db)):
                     "completed_at": cp.completed_at,
                 }
             )
+            if problem.difficulty in difficulty_counts:
+                difficulty_counts[problem.difficulty] += 1
 
     # Stats - use completed_problems (which only includes valid problems from database)
     stats = {
         "total": len(completed_problems),
-        "easy": len([p for p in completed_problems if p["difficulty"] == "Easy"]),
-        "medium": len([p for p in completed_problems if p["difficulty"] == "Medium"]),
-        "hard": len([p for p in completed_problems if p["difficulty"] == "Hard"]),
+        "easy": difficulty_counts["Easy"],
+        "medium": difficulty_counts["Medium"],
+        "hard": difficulty_counts["Hard"],
     }
 
-    # Get active codespaces
-    codespaces = []
-    if session.get("access_token"):
-        try:
-            codespaces = await list_user_codespaces(session["access_token"])
-            # Enrich with problem titles from database
-            for cs in codespaces:
-                problem = (
-                    db.query(Problem).filter(Problem.id == cs["problem_id"]).first()
-                )
-                cs["problem_title"] = problem.title if problem else cs["problem_id"]
-        except Exception:
-            # If fetching codespaces fails, continue without them
-            pass
+    # Enrich codespaces with problem titles from database
+    for cs in codespaces:
+        problem = problems_by_id.get(cs["problem_id"])
+        cs["problem_title"] = problem.title if problem else cs["problem_id"]
 
     # Get total problem count from database
-    total_problems = db.query(Problem).filter(Problem.is_active.is_(True)).count()
+    total_problems = len(get_active_problem_catalog(db).by_id)
 
     return templates.TemplateResponse(
         "dashboard.html",
@@ -1472,9 +2064,7 @@ async def dashboard(request: Request, db: Session = Depends(get_db)):
 
 
 @app.post("/problems/{problem_id}/complete")
-async def mark_complete(
-    problem_id: str, request: Request, db: Session = Depends(get_db)
-):
+def mark_complete(problem_id: str, request: Request, db: Session = Depends(get_db)):
     """Mark a problem as completed"""
     session = get_session_data(request)
 
@@ -1483,31 +2073,22 @@ async def mark_complete(
 
     user_id = session["user_id"]
 
-    # Check if already completed
-    existing = (
-        db.query(CompletedProblem)
-        .filter(
-            CompletedProblem.user_id == user_id,
-            CompletedProblem.problem_id == problem_id,
-        )
-        .first()
+    # Add completion; an existing row for this user and problem is left as is
+    result = db.execute(
+        pg_insert(CompletedProblem)
+        .values(user_id=user_id, problem_id=problem_id)
+        .on_conflict_do_nothing(index_elements=["user_id", "problem_id"])
     )
-
-    if existing is not None:
-        return JSONResponse({"status": "already_completed"})
-
-    # Add completion
-    completion = CompletedProblem(user_id=user_id, problem_id=problem_id)
-    db.add(completion)
     db.commit()
 
-    return JSONResponse({"status": "completed"})
+    if result.rowcount == 0:
+        return {"status": "already_completed"}
+
+    return {"status": "completed"}
 
 
 @app.delete("/problems/{problem_id}/complete")
-async def unmark_complete(
-    problem_id: str, request: Request, db: Session = Depends(get_db)
-):
+def unmark_complete(problem_id: str, request: Request, db: Session = Depends(get_db)):
     """Remove completion status from a problem"""
     session = get_session_data(request)
 
@@ -1516,13 +2097,14 @@ async def unmark_complete(
 
     user_id = session["user_id"]
 
-    # Delete completion
+    # Delete completion; nothing in this session holds the rows, so skip
+    # synchronizing the identity map
     db.query(CompletedProblem).filter(
         CompletedProblem.user_id == user_id, CompletedProblem.problem_id == problem_id
-    ).delete()
+    ).delete(synchronize_session=False)
     db.commit()
 
-    return JSONResponse({"status": "removed"})
+    return {"status": "removed"}
 
 
 @app.put("/user/preferences/hide-completed")
@@ -1540,12 +2122,12 @@ async def update_hide_completed(request: Request, db: Session = Depends(get_db))
     hide_completed = body.get("hide_completed", False)
 
     # Update user preference
-    user = db.query(User).filter(User.id == user_id).first()
+    user = db.get(User, user_id)
     if user:
         user.hide_completed = hide_completed
         db.commit()
 
-    return JSONResponse({"status": "updated", "hide_completed": hide_completed})
+    return {"status": "updated", "hide_completed": hide_completed}
 
 
 class TokenCompleteRequest(BaseModel):
@@ -1553,9 +2135,7 @@ class TokenCompleteRequest(BaseModel):
 
 
 @app.post("/api/complete")
-async def complete_with_token(
-    request: TokenCompleteRequest, db: Session = Depends(get_db)
-):
+def complete_with_token(request: TokenCompleteRequest, db: Session = Depends(get_db)):
     """Mark a problem as completed using a codespace token.
 
     This endpoint is called from within a codespace (e.g., by mark-complete.sh).
@@ -1563,67 +2143,58 @@ async def complete_with_token(
 
     The token was injected as a secret when the codespace was created.
     """
-    # Find the token
+    # Find the token by its hash
     token_record = (
-        db.query(CodespaceToken).filter(CodespaceToken.token == request.token).first()
+        db.query(CodespaceToken)
+        .filter(CodespaceToken.token_hash == hash_codespace_token(request.token))
+        .first()
     )
 
     if not token_record:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-    # Check if token has expired
-    # Handle both timezone-aware and naive datetimes from database
-    now = datetime.now(UTC)
-    expires_at_value = cast(datetime, token_record.expires_at)
-    if expires_at_value.tzinfo is None:
-        # If database returns naive datetime, assume it's UTC
-        expires_at_value = expires_at_value.replace(tzinfo=UTC)
-    if now.timestamp() > expires_at_value.timestamp():
+    # Check if token has expired; expires_at is stored timezone-aware
+    if datetime.now(UTC) > cast(datetime, token_record.expires_at):
         raise HTTPException(status_code=401, detail="Token has expired")
 
     # Check if already used (optional: allow multiple uses)
     # if token_record.used:
     #     raise HTTPException(status_code=400, detail="Token already used")
 
-    # Check if already completed
-    existing = (
-        db.query(CompletedProblem)
-        .filter(
-            CompletedProblem.user_id == token_record.user_id,
-            CompletedProblem.problem_id == token_record.problem_id,
-        )
-        .first()
+    # Mark as completed unless the user already completed this problem
+    result = db.execute(
+        pg_insert(CompletedProblem)
+        .values(user_id=token_record.user_id, problem_id=token_record.problem_id)
+        .on_conflict_do_nothing(index_elements=["user_id", "problem_id"])
     )
 
-    if existing is not None:
-        return JSONResponse(
-            {
-                "status": "already_completed",
-                "problem_id": token_record.problem_id,
-            }
-        )
-
-    # Mark as completed
-    completion = CompletedProblem(
-        user_id=token_record.user_id,
-        problem_id=token_record.problem_id,
-    )
-    db.add(completion)
+    if result.rowcount == 0:
+        db.commit()
+        return {
+            "status": "already_completed",
+            "problem_id": token_record.problem_id,
+        }
 
     # Mark token as used
     token_record_row: Any = token_record
     token_record_row.used = True
     db.commit()
 
-    return JSONResponse(
-        {
-            "status": "completed",
-            "problem_id": token_record.problem_id,
-        }
-    )
+    return {
+        "status": "completed",
+        "problem_id": token_record.problem_id,
+    }
 
 
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # uvloop and httptools ship with uvicorn[standard] but uvloop has no
+    # Windows build, so fall back to the asyncio loop there
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8000,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+    )
@@ -7,10 +7,10 @@ test collection) to ensure DATABASE_URL is set before any app imports.
 """
 
 import os
-import time
 
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import text
 
 # Set environment variables BEFORE importing app
 os.environ["GITHUB_CLIENT_ID"] = "test_client_id"
@@ -21,54 +21,48 @@ os.environ["SECRET_KEY"] = "test-secret-key"
 # Module-level container reference
 _postgres_container = None
 
+# Set by the process that starts the container; pytest-xdist workers inherit
+# it from the controller and reuse that container instead of starting their own
+SHARED_POSTGRES_URL_ENV = "LLMEETCODE_TEST_POSTGRES_URL"
 
-def _wait_for_postgres(
-    connection_url: str, max_retries: int = 30, delay: float = 0.5
-) -> bool:
-    """
-    Wait for PostgreSQL to be ready to accept connections.
 
-    Args:
-        connection_url: SQLAlchemy connection URL
-        max_retries: Maximum number of connection attempts
-        delay: Delay between retries in seconds
+def _create_worker_database(shared_url: str, worker_id: str) -> str:
+    """Create an empty database for one xdist worker and return its URL."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.engine import make_url
 
-    Returns:
-        True if connection succeeded, raises RuntimeError otherwise
-    """
-    from urllib.parse import urlparse
+    database_name = f"test_db_{worker_id}"
+    engine = create_engine(shared_url, isolation_level="AUTOCOMMIT")
+    try:
+        with engine.connect() as connection:
+            connection.execute(text(f'DROP DATABASE IF EXISTS "{database_name}"'))
+            connection.execute(text(f'CREATE DATABASE "{database_name}"'))
+    finally:
+        engine.dispose()
 
-    import psycopg2
+    worker_url = make_url(shared_url).set(database=database_name)
+    return worker_url.render_as_string(hide_password=False)
 
-    parsed = urlparse(connection_url)
-    dbname = parsed.path.lstrip("/")
 
-    for attempt in range(1, max_retries + 1):
-        try:
-            conn = psycopg2.connect(
-                host=parsed.hostname,
-                port=parsed.port,
-                user=parsed.username,
-                password=parsed.password,
-                dbname=dbname,
-            )
-            conn.close()
-            print(f"PostgreSQL ready after {attempt} attempt(s)")
-            return True
-        except psycopg2.OperationalError:
-            if attempt < max_retries:
-                time.sleep(delay)
-            else:
-                raise RuntimeError(
-                    f"PostgreSQL not ready after {max_retries} attempts "
-                    f"({max_retries * delay:.1f}s)"
-                ) from None
-    return False
+def _setup_postgres():
+    """Start PostgreSQL container and wait for it to be ready.
 
+    Under pytest-xdist the controller starts the only container and each
+    worker gets its own database inside it.
 
-def _setup_postgres():
-    """Start PostgreSQL container and wait for it to be ready."""
+    start() already blocks until PostgreSQL reports it is ready to accept
+    connections, so no separate connection polling is needed. The data directory
+    lives in tmpfs with durability turned off, since the database is thrown
+    away after the run.
+    """
     global _postgres_container
+    worker_id = os.environ.get("PYTEST_XDIST_WORKER")
+    shared_url = os.environ.get(SHARED_POSTGRES_URL_ENV)
+    if worker_id and shared_url:
+        os.environ["DATABASE_URL"] = _create_worker_database(shared_url, worker_id)
+        print(f"[Setup] {worker_id} using shared PostgreSQL container")
+        return
+
     from testcontainers.postgres import PostgresContainer
 
     print("\n[Setup] Starting PostgreSQL container...")
@@ -77,14 +71,14 @@ def _setup_postgres():
         username="test",
         password="test",
         dbname="test_db",
+        tmpfs={"/var/lib/postgresql/data": "rw"},
+    ).with_command(
+        "postgres -c fsync=off -c synchronous_commit=off -c full_page_writes=off"
     )
     _postgres_container.start()
 
     connection_url = _postgres_container.get_connection_url()
-    print("[Setup] Container started, waiting for PostgreSQL to be ready...")
-
-    _wait_for_postgres(connection_url)
-
+    os.environ[SHARED_POSTGRES_URL_ENV] = connection_url
     os.environ["DATABASE_URL"] = connection_url
     print(f"[Setup] DATABASE_URL set to: {connection_url}")
 
@@ -109,18 +103,50 @@ def pytest_sessionfinish(session, exitstatus):
             print(f"[Teardown] Error stopping container: {e}")
 
 
+@pytest.fixture(autouse=True)
+def reset_github_caches():
+    """Keep in-process caches from leaking between tests."""
+    from app.main import (
+        _codespace_list_cache,
+        _codespace_list_etags,
+        _machine_type_cache,
+        invalidate_problem_catalog,
+    )
+
+    _machine_type_cache.clear()
+    _codespace_list_cache.clear()
+    _codespace_list_etags.clear()
+    invalidate_problem_catalog()
+    yield
+    _machine_type_cache.clear()
+    _codespace_list_cache.clear()
+    _codespace_list_etags.clear()
+    invalidate_problem_catalog()
+
+
 @pytest.fixture
 def client(db_session):
     """Create a test client for the FastAPI app."""
     return TestClient(app)
 
 
+@pytest.fixture(scope="session")
+def database_schema():
+    """Create the schema once for the whole test session."""
+    from app.database import Base, get_engine
+
+    engine = get_engine()
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
 @pytest.fixture
-def db_session():
+def db_session(database_schema):
     """
     Create a test database session.
 
-    Creates tables before yielding and cleans up after each test.
+    Seeds the test problems before yielding and empties every table after each
+    test, so each test starts from the same data without recreating the schema.
     """
     from app.database import (
         SLOW_API_DETAIL_OVERVIEW,
@@ -131,17 +157,11 @@ def db_session():
         Base,
         Problem,
         ProblemSolutionSubmission,
-        get_engine,
         get_session_local,
         normalize_youtube_embed_url,
     )
 
-    engine = get_engine()
     SessionLocal = get_session_local()
-
-    # Ensure tables exist
-    Base.metadata.create_all(bind=engine)
-
     session = SessionLocal()
 
     # Seed test problems if they don't exist
@@ -195,9 +215,13 @@ def db_session():
         yield session
     finally:
         session.close()
-        # Clean up database after test
-        Base.metadata.drop_all(bind=engine)
-        Base.metadata.create_all(bind=engine)
+        # Clean up database after test: one TRUNCATE of every table (resetting
+        # id sequences) is far cheaper than dropping and recreating the schema
+        table_names = ", ".join(
+            f'"{table.name}"' for table in Base.metadata.sorted_tables
+        )
+        with database_schema.begin() as connection:
+            connection.execute(text(f"TRUNCATE {table_names} RESTART IDENTITY CASCADE"))
 
 
 @pytest.fixture
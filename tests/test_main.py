@@ -1,12 +1,12 @@
 """Tests for main application endpoints"""
 
 import asyncio
+import json
 from datetime import UTC, datetime
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from fastapi import HTTPException
-from itsdangerous import BadSignature
 
 from app.database import (
     CodespaceToken,
@@ -15,9 +15,13 @@ from app.database import (
     ProblemSolutionSubmission,
     User,
     UserRepo,
+    hash_codespace_token,
 )
 from app.main import (
+    BadSessionToken,
+    SessionSerializer,
     build_problem_overview_paragraphs,
+    build_session_cookie_template,
     create_codespace,
     delete_codespace,
     get_session_data,
@@ -61,6 +65,14 @@ GITHUB_CODESPACES_EMPTY = {
 }
 
 
+def patch_github_client():
+    """Patch the shared GitHub HTTP client with an async test double."""
+    return patch(
+        "app.main.get_http_client",
+        new_callable=lambda: MagicMock(return_value=AsyncMock()),
+    )
+
+
 class TestHome:
     """Test cases for the home page"""
 
@@ -94,6 +106,44 @@ class TestHome:
         # Should show all problems when not logged in (no completed problems)
         assert len(response.context["problems"]) >= 1
 
+    def test_home_sets_etag(self, client, db_session):
+        """Test anonymous home renders are publicly cacheable for a short time"""
+        response = client.get("/")
+        assert response.status_code == 200
+        assert response.headers["etag"]
+        assert response.headers["cache-control"] == "public, max-age=60"
+        assert response.headers["vary"] == "Cookie"
+
+    def test_home_etag_varies_with_filters(self, client, db_session):
+        """Test anonymous ETags differ per filter combination"""
+        etag = client.get("/").headers["etag"]
+
+        assert client.get("/?difficulty=Easy").headers["etag"] != etag
+
+    def test_home_authenticated_etag_is_private(self, authenticated_client):
+        """Test personalized home renders must be revalidated and stay private"""
+        response = authenticated_client.get("/")
+        assert response.status_code == 200
+        assert response.headers["etag"]
+        assert response.headers["cache-control"] == "private, no-cache"
+
+    def test_home_not_modified_with_matching_etag(self, client, db_session):
+        """Test home page answers 304 when the client already has the render"""
+        etag = client.get("/").headers["etag"]
+
+        response = client.get("/", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+    def test_template_digest_is_stable(self):
+        """Every worker derives the same ETag salt from the template sources"""
+        from app.main import template_digest
+
+        digest = template_digest()
+        assert digest == template_digest()
+        assert len(digest) == 32
+
     @patch("app.main.list_user_codespaces")
     def test_home_shows_active_codespaces(
         self, mock_list_codespaces, authenticated_client
@@ -174,6 +224,135 @@ class TestHome:
         assert "Hidden Owner Problem" in bpalagi_response.text
 
 
+class TestProblemsApi:
+    """Tests for the JSON problem catalog"""
+
+    def test_list_problems_api(self, client):
+        """Test active problems are listed as cacheable JSON"""
+        response = client.get("/api/problems")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        assert response.headers["cache-control"] == "public, max-age=300"
+        assert response.headers["etag"]
+        problem_ids = [problem["id"] for problem in response.json()]
+        assert "slow-api" in problem_ids
+
+    def test_list_problems_api_not_modified(self, client):
+        """Test a matching If-None-Match is answered with an empty 304"""
+        etag = client.get("/api/problems").headers["etag"]
+
+        response = client.get("/api/problems", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+    def test_list_problems_api_excludes_inactive(self, client, db_session):
+        """Test inactive problems are left out of the catalog"""
+        db_session.add(
+            Problem(
+                id="hidden-api-problem",
+                title="Hidden",
+                description="Not listed",
+                difficulty="Easy",
+                language="Python",
+                template_repo="owner/hidden-template",
+                is_active=False,
+            )
+        )
+        db_session.commit()
+
+        response = client.get("/api/problems")
+        problem_ids = [problem["id"] for problem in response.json()]
+        assert "hidden-api-problem" not in problem_ids
+
+
+class TestProblemCatalog:
+    """Tests for the in-process active problem catalog"""
+
+    def test_catalog_is_reused_until_invalidated(self, db_session):
+        """Test reads share a snapshot and invalidation picks up new rows"""
+        from app.main import get_active_problem_catalog, invalidate_problem_catalog
+
+        first = get_active_problem_catalog(db_session)
+        assert "slow-api" in first.by_id
+
+        db_session.add(
+            Problem(
+                id="catalog-problem",
+                title="Catalog",
+                description="Added after the snapshot",
+                difficulty="Easy",
+                language="Python",
+                template_repo="owner/catalog-template",
+                is_active=True,
+            )
+        )
+        db_session.commit()
+
+        assert get_active_problem_catalog(db_session) is first
+        assert "catalog-problem" not in first.by_id
+
+        invalidate_problem_catalog()
+        assert "catalog-problem" in get_active_problem_catalog(db_session).by_id
+
+    def test_build_problem_catalog_indexes_facets(self):
+        """Test filter facets and per-facet id sets are precomputed"""
+        from app.main import build_problem_catalog
+
+        catalog = build_problem_catalog(
+            [
+                {"id": "a", "difficulty": "Hard", "language": "Go"},
+                {"id": "b", "difficulty": "Easy", "language": "Go"},
+                {"id": "c", "difficulty": "Easy", "language": "Python"},
+            ]
+        )
+
+        assert list(catalog.by_id) == ["a", "b", "c"]
+        assert catalog.difficulties == ("Easy", "Hard")
+        assert catalog.languages == ("Go", "Python")
+        assert catalog.ids_by_difficulty["Easy"] == {"b", "c"}
+        assert catalog.ids_by_language["Go"] == {"a", "b"}
+
+    def test_build_problem_catalog_serializes_api_body_once(self):
+        """Test the API body and ETag are built with the snapshot, ordered by id"""
+        from app.main import build_problem_catalog
+
+        catalog = build_problem_catalog(
+            [
+                {"id": "b", "difficulty": "Easy", "language": "Go"},
+                {"id": "a", "difficulty": "Hard", "language": "Go"},
+            ]
+        )
+
+        assert [problem["id"] for problem in json.loads(catalog.api_body)] == [
+            "a",
+            "b",
+        ]
+        assert catalog.api_etag == f'"{catalog.fingerprint}"'
+
+    def test_editing_a_problem_refreshes_catalog(self, owner_client):
+        """Test saving a problem through the editor updates the catalog"""
+        assert "Slow API Performance" in owner_client.get("/").text
+
+        owner_client.post(
+            "/problems/slow-api/edit",
+            data={
+                "title": "Renamed Slow API",
+                "description": "Updated description",
+                "difficulty": "Medium",
+                "language": "Java",
+                "is_active": "true",
+                "detail_summary": "Summary",
+                "detail_overview": "Overview",
+                "domain_specialization": "Performance",
+                "template_repo": "bpalagi/slow-api-template",
+                "youtube_url": "",
+            },
+        )
+
+        assert "Renamed Slow API" in owner_client.get("/").text
+
+
 class TestProblemAuthoring:
     """Test the add-problem authoring flow."""
 
@@ -694,7 +873,7 @@ class TestProblemAuthoring:
         )
         db_session.add(
             CodespaceToken(
-                token="delete-problem-token",
+                token_hash=hash_codespace_token("delete-problem-token"),
                 user_id=user.id,
                 problem_id="slow-api",
                 codespace_name="slow-api-space",
@@ -913,6 +1092,11 @@ class TestAuth:
         response = client.get("/auth/login", follow_redirects=False)
         assert response.status_code == 302
         assert "github.com/login/oauth/authorize" in response.headers["location"]
+        assert "client_id=test_client_id" in response.headers["location"]
+        assert (
+            "redirect_uri=http%3A%2F%2Flocalhost%3A8000%2Fauth%2Fcallback"
+            in response.headers["location"]
+        )
 
     def test_logout(self, client):
         """Test logout functionality"""
@@ -920,7 +1104,28 @@ class TestAuth:
         assert response.status_code == 302
         assert response.headers["location"] == "/"
 
-    @patch("app.main.httpx.AsyncClient")
+    def test_logout_drops_cached_codespace_listings(
+        self, authenticated_client, db_session
+    ):
+        """Logging out forgets the codespace listings cached for the session"""
+        from app.main import (
+            _codespace_list_cache,
+            _codespace_list_etags,
+            codespace_listing_key,
+        )
+
+        user = db_session.query(User).filter(User.github_id == 12345).one()
+        listing_key = codespace_listing_key("test_token")
+        _codespace_list_etags[listing_key] = ('"listing-v1"', [])
+        _codespace_list_cache[user.id] = (0.0, [])
+
+        response = authenticated_client.get("/auth/logout", follow_redirects=False)
+
+        assert response.status_code == 302
+        assert listing_key not in _codespace_list_etags
+        assert user.id not in _codespace_list_cache
+
+    @patch_github_client()
     def test_auth_callback_success(self, mock_client, client):
         """Test successful OAuth callback"""
         from app.database import get_db
@@ -942,24 +1147,24 @@ class TestAuth:
             # Mock the token exchange
             mock_token_response = MagicMock()
             mock_token_response.status_code = 200
-            mock_token_response.json.return_value = {"access_token": "test_token"}
+            mock_token_response.content = json.dumps(
+                {"access_token": "test_token"}
+            ).encode()
 
             # Mock the user info request
             mock_user_response = MagicMock()
             mock_user_response.status_code = 200
-            mock_user_response.json.return_value = {
-                "id": 12345,
-                "login": "testuser",
-                "name": "Test User",
-                "avatar_url": "https://example.com/avatar.jpg",
-            }
-
-            mock_client.return_value.__aenter__.return_value.post.return_value = (
-                mock_token_response
-            )
-            mock_client.return_value.__aenter__.return_value.get.return_value = (
-                mock_user_response
-            )
+            mock_user_response.content = json.dumps(
+                {
+                    "id": 12345,
+                    "login": "testuser",
+                    "name": "Test User",
+                    "avatar_url": "https://example.com/avatar.jpg",
+                }
+            ).encode()
+
+            mock_client.return_value.post.return_value = mock_token_response
+            mock_client.return_value.get.return_value = mock_user_response
 
             response = client.get(
                 "/auth/callback?code=test_code", follow_redirects=False
@@ -967,65 +1172,95 @@ class TestAuth:
             assert response.status_code == 302
             assert response.headers["location"] == "/"
             assert "session" in response.cookies
+            set_cookie = response.headers["set-cookie"]
+            assert "HttpOnly" in set_cookie
+            assert "Max-Age=3600" in set_cookie
+            assert "SameSite=lax" in set_cookie
+            # The test redirect URI is plain http, so the cookie is not Secure
+            assert "Secure" not in set_cookie
         finally:
             app.dependency_overrides.clear()
 
-    @patch("httpx.AsyncClient")
+    def test_session_cookie_secure_for_https_deployments(self):
+        """Test the session cookie is marked Secure when served over https"""
+        secure_template = build_session_cookie_template(secure=True)
+        assert secure_template.endswith("; Secure")
+        assert "HttpOnly" in secure_template
+        assert "Secure" not in build_session_cookie_template(secure=False)
+
+    @patch_github_client()
+    def test_auth_callback_sets_secure_cookie_over_https(self, mock_client, client):
+        """Test the callback sends the Secure attribute for https deployments"""
+        mock_token_response = MagicMock()
+        mock_token_response.status_code = 200
+        mock_token_response.content = json.dumps({"access_token": "test"}).encode()
+        mock_user_response = MagicMock()
+        mock_user_response.status_code = 200
+        mock_user_response.content = json.dumps(
+            {"id": 424242, "login": "secureuser"}
+        ).encode()
+        mock_client.return_value.post.return_value = mock_token_response
+        mock_client.return_value.get.return_value = mock_user_response
+
+        with patch(
+            "app.main.SESSION_COOKIE_TEMPLATE",
+            build_session_cookie_template(secure=True),
+        ):
+            response = client.get(
+                "/auth/callback?code=test_code", follow_redirects=False
+            )
+
+        assert response.status_code == 302
+        assert response.headers["set-cookie"].endswith("; Secure")
+
+    @patch_github_client()
     def test_auth_callback_error(self, mock_client, client):
         """Test OAuth callback with error"""
         mock_response = MagicMock()
         mock_response.status_code = 400
-        mock_client.return_value.__aenter__.return_value.post.return_value = (
-            mock_response
-        )
+        mock_client.return_value.post.return_value = mock_response
 
         response = client.get("/auth/callback?code=invalid_code")
         assert response.status_code == 400
 
-    @patch("httpx.AsyncClient")
+    @patch_github_client()
     def test_auth_callback_token_exchange_failure(self, mock_client, client):
         """Test auth callback when token exchange fails"""
         mock_response = MagicMock()
         mock_response.status_code = 400
-        mock_client.return_value.__aenter__.return_value.post.return_value = (
-            mock_response
-        )
+        mock_client.return_value.post.return_value = mock_response
 
         response = client.get("/auth/callback?code=invalid_code")
         assert response.status_code == 400
 
-    @patch("httpx.AsyncClient")
+    @patch_github_client()
     def test_auth_callback_no_access_token(self, mock_client, client):
         """Test auth callback when no access token is returned"""
         mock_token_response = MagicMock()
         mock_token_response.status_code = 200
-        mock_token_response.json.return_value = {"error": "invalid_grant"}
+        mock_token_response.content = json.dumps({"error": "invalid_grant"}).encode()
 
-        mock_client.return_value.__aenter__.return_value.post.return_value = (
-            mock_token_response
-        )
+        mock_client.return_value.post.return_value = mock_token_response
 
         response = client.get("/auth/callback?code=invalid_code")
         assert response.status_code == 400
 
-    @patch("httpx.AsyncClient")
+    @patch_github_client()
     def test_auth_callback_user_info_failure(self, mock_client, client):
         """Test auth callback when getting user info fails"""
         # Mock successful token exchange
         mock_token_response = MagicMock()
         mock_token_response.status_code = 200
-        mock_token_response.json.return_value = {"access_token": "test_token"}
+        mock_token_response.content = json.dumps(
+            {"access_token": "test_token"}
+        ).encode()
 
         # Mock failed user info request
         mock_user_response = MagicMock()
         mock_user_response.status_code = 400
 
-        mock_client.return_value.__aenter__.return_value.post.return_value = (
-            mock_token_response
-        )
-        mock_client.return_value.__aenter__.return_value.get.return_value = (
-            mock_user_response
-        )
+        mock_client.return_value.post.return_value = mock_token_response
+        mock_client.return_value.get.return_value = mock_user_response
 
         response = client.get("/auth/callback?code=test_code")
         assert response.status_code == 400
@@ -1070,11 +1305,85 @@ class TestCodespaces:
         )
         assert response.status_code == 500
 
+    def test_create_codespace_deduplicates_concurrent_requests(self):
+        """Test concurrent requests for the same problem share one creation"""
+        from app.main import CodespaceRequest, create_codespace_endpoint
+
+        calls = 0
+
+        async def fake_create_codespace(**kwargs):
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"name": "shared-codespace"}
+
+        session = {
+            "access_token": "test_token",
+            "user_id": 1,
+            "user": {"login": "testuser"},
+        }
+
+        async def create_twice():
+            body = CodespaceRequest(problem_id="two-sum")
+            return await asyncio.gather(
+                create_codespace_endpoint(body, MagicMock(), MagicMock()),
+                create_codespace_endpoint(body, MagicMock(), MagicMock()),
+            )
+
+        with (
+            patch("app.main.get_session_data", return_value=session),
+            patch("app.main.create_codespace", side_effect=fake_create_codespace),
+        ):
+            results = asyncio.run(create_twice())
+
+        assert results == [{"name": "shared-codespace"}, {"name": "shared-codespace"}]
+        assert calls == 1
+
+    def test_create_codespace_throttled_limits_concurrency(self):
+        """Test codespace creations beyond the concurrency cap wait their turn"""
+        from app.main import create_codespace_throttled
+
+        running = 0
+        max_running = 0
+
+        async def fake_create_codespace(**kwargs):
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return {"name": kwargs["problem_id"]}
+
+        async def create_many():
+            return await asyncio.gather(
+                *(
+                    create_codespace_throttled(
+                        access_token="test_token",
+                        problem_id=f"problem-{i}",
+                        username="testuser",
+                        user_id=1,
+                        db=MagicMock(),
+                    )
+                    for i in range(4)
+                )
+            )
+
+        with (
+            patch("app.main._codespace_creation_semaphore", asyncio.Semaphore(2)),
+            patch("app.main.create_codespace", side_effect=fake_create_codespace),
+        ):
+            results = asyncio.run(create_many())
+
+        assert [result["name"] for result in results] == [
+            f"problem-{i}" for i in range(4)
+        ]
+        assert max_running == 2
+
 
 class TestCreateCodespaceFunction:
     """Test codespace creation function"""
 
-    @patch("app.main.httpx.AsyncClient")
+    @patch_github_client()
     def test_create_codespace_invalid_problem(self, mock_client, db_session):
         """Test create_codespace with invalid problem ID"""
         import asyncio
@@ -1092,18 +1401,16 @@ class TestCreateCodespaceFunction:
         assert exc_info.value.status_code == 404
         assert "Problem not found" in exc_info.value.detail
 
-    @patch("app.main.httpx.AsyncClient")
+    @patch_github_client()
     def test_create_codespace_template_not_found(self, mock_client, db_session):
         """Test create_codespace when template repository is not found"""
         import asyncio
 
         mock_response = MagicMock()
         mock_response.status_code = 404
-        mock_response.json.return_value = {"message": "Not Found"}
+        mock_response.content = json.dumps({"message": "Not Found"}).encode()
 
-        mock_client.return_value.__aenter__.return_value.post.return_value = (
-            mock_response
-        )
+        mock_client.return_value.post.return_value = mock_response
 
         with pytest.raises(HTTPException) as exc_info:
             asyncio.run(
@@ -1117,7 +1424,43 @@ class TestCreateCodespaceFunction:
             )
         assert "not marked as a template" in exc_info.value.detail
 
-    @patch("app.main.httpx.AsyncClient")
+    @patch_github_client()
+    def test_create_codespace_branch_never_ready(self, mock_client, db_session):
+        """Test create_codespace gives up and deletes the repo if the branch never appears"""
+        mock_generate_response = MagicMock()
+        mock_generate_response.status_code = 201
+        mock_generate_response.content = json.dumps(
+            {
+                "id": 456,
+                "full_name": "testuser/llmeetcode-two-sum-abc123",
+                "default_branch": "main",
+            }
+        ).encode()
+
+        mock_branch_response = MagicMock()
+        mock_branch_response.status_code = 404
+
+        mock_client.return_value.post.return_value = mock_generate_response
+        mock_client.return_value.head.return_value = mock_branch_response
+
+        with (
+            patch("asyncio.sleep", new_callable=AsyncMock),
+            patch("app.main.BRANCH_POLL_TIMEOUT", 0),
+            pytest.raises(HTTPException) as exc_info,
+        ):
+            asyncio.run(
+                create_codespace(
+                    access_token="test_token",
+                    problem_id="two-sum",
+                    username="testuser",
+                    user_id=1,
+                    db=db_session,
+                )
+            )
+        assert "branch not available" in exc_info.value.detail
+        mock_client.return_value.delete.assert_called_once()
+
+    @patch_github_client()
     def test_create_codespace_creation_failed(self, mock_client, db_session):
         """Test create_codespace when codespace creation fails"""
         import asyncio
@@ -1125,36 +1468,41 @@ class TestCreateCodespaceFunction:
         # Mock template repo generation response (success)
         mock_generate_response = MagicMock()
         mock_generate_response.status_code = 201
-        mock_generate_response.json.return_value = {
-            "id": 456,
-            "full_name": "testuser/llmeetcode-two-sum-abc123",
-            "default_branch": "main",
-        }
+        mock_generate_response.content = json.dumps(
+            {
+                "id": 456,
+                "full_name": "testuser/llmeetcode-two-sum-abc123",
+                "default_branch": "main",
+            }
+        ).encode()
 
         # Mock machines response
         mock_machines_response = MagicMock()
         mock_machines_response.status_code = 200
-        mock_machines_response.json.return_value = {"machines": []}
+        mock_machines_response.content = json.dumps({"machines": []}).encode()
 
         # Mock codespace creation response (failure)
         mock_creation_response = MagicMock()
         mock_creation_response.status_code = 400
-        mock_creation_response.json.return_value = {"message": "Insufficient quota"}
+        mock_creation_response.content = json.dumps(
+            {"message": "Insufficient quota"}
+        ).encode()
 
         # Mock repo deletion response (cleanup)
         mock_delete_response = MagicMock()
         mock_delete_response.status_code = 204
 
-        mock_client.return_value.__aenter__.return_value.get.return_value = (
-            mock_machines_response
-        )
-        mock_client.return_value.__aenter__.return_value.post.side_effect = [
+        # Mock branch check response
+        mock_branch_response = MagicMock()
+        mock_branch_response.status_code = 200
+
+        mock_client.return_value.head.return_value = mock_branch_response
+        mock_client.return_value.get.return_value = mock_machines_response
+        mock_client.return_value.post.side_effect = [
             mock_generate_response,
             mock_creation_response,
         ]
-        mock_client.return_value.__aenter__.return_value.delete.return_value = (
-            mock_delete_response
-        )
+        mock_client.return_value.delete.return_value = mock_delete_response
 
         with pytest.raises(HTTPException) as exc_info:
             asyncio.run(
@@ -1168,7 +1516,7 @@ class TestCreateCodespaceFunction:
             )
         assert "Failed to create codespace" in exc_info.value.detail
 
-    @patch("app.main.httpx.AsyncClient")
+    @patch_github_client()
     def test_create_codespace_success(self, mock_client, db_session):
         """Test successful codespace creation"""
         import asyncio
@@ -1190,11 +1538,13 @@ class TestCreateCodespaceFunction:
         # Mock template repo generation response
         mock_generate_response = MagicMock()
         mock_generate_response.status_code = 201
-        mock_generate_response.json.return_value = {
-            "id": 456,
-            "full_name": "testuser/llmeetcode-two-sum-abc123",
-            "default_branch": "main",
-        }
+        mock_generate_response.content = json.dumps(
+            {
+                "id": 456,
+                "full_name": "testuser/llmeetcode-two-sum-abc123",
+                "default_branch": "main",
+            }
+        ).encode()
 
         # Mock branch check response
         mock_branch_response = MagicMock()
@@ -1203,38 +1553,36 @@ class TestCreateCodespaceFunction:
         # Mock machines response
         mock_machines_response = MagicMock()
         mock_machines_response.status_code = 200
-        mock_machines_response.json.return_value = {
-            "machines": [{"name": "standardLinux"}]
-        }
+        mock_machines_response.content = json.dumps(
+            {"machines": [{"name": "standardLinux"}]}
+        ).encode()
 
         # Mock codespace creation response
         mock_creation_response = MagicMock()
         mock_creation_response.status_code = 201
-        mock_creation_response.json.return_value = {
-            "name": "test-codespace",
-            "web_url": "https://github.com/codespaces/test",
-            "state": "Creating",
-            "created_at": "2024-01-01T00:00:00Z",
-        }
+        mock_creation_response.content = json.dumps(
+            {
+                "name": "test-codespace",
+                "web_url": "https://github.com/codespaces/test",
+                "state": "Creating",
+                "created_at": "2024-01-01T00:00:00Z",
+            }
+        ).encode()
 
         # Mock config file creation response
         mock_config_response = MagicMock()
         mock_config_response.status_code = 201
 
-        # Set up GET responses: branch check, machines
-        mock_client.return_value.__aenter__.return_value.get.side_effect = [
-            mock_branch_response,
-            mock_machines_response,
-        ]
+        # Set up HEAD response for the branch check and GET for machines
+        mock_client.return_value.head.return_value = mock_branch_response
+        mock_client.return_value.get.return_value = mock_machines_response
         # Set up POST responses: repo generation, codespace creation
-        mock_client.return_value.__aenter__.return_value.post.side_effect = [
+        mock_client.return_value.post.side_effect = [
             mock_generate_response,
             mock_creation_response,
         ]
         # Set up PUT response for config file creation
-        mock_client.return_value.__aenter__.return_value.put.return_value = (
-            mock_config_response
-        )
+        mock_client.return_value.put.return_value = mock_config_response
 
         # Get the user_id as an integer for the function call
         the_user_id: int = user.id  # type: ignore[assignment]
@@ -1255,7 +1603,99 @@ class TestCreateCodespaceFunction:
         assert "repo_name" in result
 
         # Verify PUT was called for config file creation
-        mock_client.return_value.__aenter__.return_value.put.assert_called_once()
+        mock_client.return_value.put.assert_called_once()
+
+        # The generated repo and the codespace share one name
+        generate_call, codespace_call = mock_client.return_value.post.call_args_list
+        repo_name = generate_call.kwargs["json"]["name"]
+        assert repo_name.startswith("llmeetcode-two-sum-")
+        assert codespace_call.kwargs["json"]["display_name"] == repo_name
+
+        # Verify the completion token and repo were recorded
+        token_record = (
+            db_session.query(CodespaceToken)
+            .filter(CodespaceToken.codespace_name == "test-codespace")
+            .one()
+        )
+        assert token_record.user_id == the_user_id
+        assert token_record.used is False
+        user_repo = (
+            db_session.query(UserRepo)
+            .filter(UserRepo.codespace_name == "test-codespace")
+            .one()
+        )
+        assert user_repo.template_repo == "test/two-sum-template"
+
+    @patch_github_client()
+    def test_create_codespace_uses_cached_machine_type(self, mock_client, db_session):
+        """Test a cached machine type skips the machines lookup"""
+        from app.main import cache_machine_type
+
+        user = User(github_id=99998, login="cacheuser", name="Cache User")
+        db_session.add(user)
+        db_session.commit()
+        db_session.refresh(user)
+        the_user_id: int = user.id  # type: ignore[assignment]
+
+        cache_machine_type("test/two-sum-template", the_user_id, "premiumLinux")
+
+        mock_generate_response = MagicMock()
+        mock_generate_response.status_code = 201
+        mock_generate_response.content = json.dumps(
+            {
+                "id": 456,
+                "full_name": "testuser/llmeetcode-two-sum-abc123",
+                "default_branch": "main",
+            }
+        ).encode()
+
+        mock_branch_response = MagicMock()
+        mock_branch_response.status_code = 200
+
+        mock_config_response = MagicMock()
+        mock_config_response.status_code = 201
+
+        mock_creation_response = MagicMock()
+        mock_creation_response.status_code = 201
+        mock_creation_response.content = json.dumps(
+            {
+                "name": "cached-codespace",
+                "web_url": "https://github.com/codespaces/cached",
+                "state": "Creating",
+            }
+        ).encode()
+
+        mock_client.return_value.head.return_value = mock_branch_response
+        mock_client.return_value.put.return_value = mock_config_response
+        mock_client.return_value.post.side_effect = [
+            mock_generate_response,
+            mock_creation_response,
+        ]
+
+        result = asyncio.run(
+            create_codespace(
+                access_token="test_token",
+                problem_id="two-sum",
+                username="testuser",
+                user_id=the_user_id,
+                db=db_session,
+            )
+        )
+
+        assert result["name"] == "cached-codespace"
+        # The machines lookup is skipped entirely
+        mock_client.return_value.get.assert_not_called()
+        codespace_payload = mock_client.return_value.post.call_args.kwargs["json"]
+        assert codespace_payload["machine"] == "premiumLinux"
+
+    def test_cached_machine_type_is_per_user(self):
+        """One user's machine type is never reused for another user"""
+        from app.main import cache_machine_type, get_cached_machine_type
+
+        cache_machine_type("test/two-sum-template", 1, "premiumLinux")
+
+        assert get_cached_machine_type("test/two-sum-template", 1) == "premiumLinux"
+        assert get_cached_machine_type("test/two-sum-template", 2) is None
 
 
 class TestDashboard:
@@ -1387,7 +1827,7 @@ class TestSessionData:
         request.cookies = {"session": "invalid_token"}
 
         with patch("app.main.serializer") as mock_serializer:
-            mock_serializer.loads.side_effect = BadSignature("Invalid signature")
+            mock_serializer.loads.side_effect = BadSessionToken("Invalid signature")
             result = get_session_data(request)
             assert result == {}
 
@@ -1408,10 +1848,72 @@ class TestSessionData:
         request.cookies = {"session": "expired_token"}
 
         with patch("app.main.serializer") as mock_serializer:
-            mock_serializer.loads.side_effect = BadSignature("Token expired")
+            mock_serializer.loads.side_effect = BadSessionToken("Token expired")
             result = get_session_data(request)
             assert result == {}
 
+    def test_get_session_data_memoized_per_request(self):
+        """Test the session cookie is only verified once per request"""
+        from starlette.requests import Request
+
+        request = Request(
+            {"type": "http", "headers": [(b"cookie", b"session=valid_token")]}
+        )
+
+        with patch("app.main.serializer") as mock_serializer:
+            mock_serializer.loads.return_value = {"user_id": 123}
+            assert get_session_data(request) == {"user_id": 123}
+            assert get_session_data(request) == {"user_id": 123}
+
+        mock_serializer.loads.assert_called_once()
+
+
+class TestSessionSerializer:
+    """Test the signed session cookie codec"""
+
+    def test_round_trip(self):
+        """Serialized session data loads back unchanged"""
+        codec = SessionSerializer("secret")
+        data = {"user_id": 1, "user": {"login": "testuser", "name": None}}
+
+        assert codec.loads(codec.dumps(data)) == data
+
+    def test_rejects_tampered_token(self):
+        """A token modified after signing is rejected"""
+        codec = SessionSerializer("secret")
+        token = codec.dumps({"user_id": 1})
+        tampered = token[:-2] + ("A" if token[-2] != "A" else "B") + token[-1]
+
+        with pytest.raises(BadSessionToken):
+            codec.loads(tampered)
+
+    def test_rejects_token_signed_with_other_key(self):
+        """A token signed with a different secret is rejected"""
+        token = SessionSerializer("other-secret").dumps({"user_id": 1})
+
+        with pytest.raises(BadSessionToken):
+            SessionSerializer("secret").loads(token)
+
+    def test_rejects_expired_token(self):
+        """A token older than max_age is rejected"""
+        codec = SessionSerializer("secret")
+        with patch("app.main.time.time", return_value=1_000_000):
+            token = codec.dumps({"user_id": 1})
+
+        with (
+            patch("app.main.time.time", return_value=1_000_000 + 3601),
+            pytest.raises(BadSessionToken),
+        ):
+            codec.loads(token, max_age=3600)
+
+    def test_rejects_garbage(self):
+        """Non-token input is rejected rather than raising unexpected errors"""
+        codec = SessionSerializer("secret")
+
+        for token in ("", "not_a_valid_token", "!!!", "é"):
+            with pytest.raises(BadSessionToken):
+                codec.loads(token)
+
 
 class TestErrorHandling:
     """Test various error handling scenarios"""
@@ -1465,21 +1967,81 @@ class TestSessionEdgeCases:
         assert response.status_code == 401
 
 
+class TestStaticFiles:
+    """Test static asset serving"""
+
+    def test_static_files_are_cacheable(self, client):
+        """Static assets tell browsers to reuse them without re-requesting"""
+        response = client.get("/static/favicon.svg")
+        assert response.status_code == 200
+        assert response.headers["cache-control"] == "public, max-age=86400"
+
+
+class TestHttpClient:
+    """Test the shared GitHub HTTP client lifecycle"""
+
+    def test_get_http_client_reuses_instance(self):
+        """Repeated calls share one pooled client until it is closed"""
+        from app.main import GITHUB_API_URL, close_http_client, get_http_client
+
+        first = get_http_client()
+        assert get_http_client() is first
+        assert first.headers["X-GitHub-Api-Version"] == "2022-11-28"
+        assert str(first.base_url).rstrip("/") == GITHUB_API_URL
+
+        asyncio.run(close_http_client())
+        assert first.is_closed
+
+        second = get_http_client()
+        assert second is not first
+        asyncio.run(close_http_client())
+
+    def test_get_http_client_discards_cookies(self):
+        """Cookies set by GitHub are never stored on the shared client"""
+        import httpx
+
+        from app.main import close_http_client, get_http_client
+
+        client = get_http_client()
+        response = httpx.Response(
+            200,
+            headers={"Set-Cookie": "_gh_sess=abc; Path=/; Secure"},
+            request=httpx.Request(
+                "POST", "https://github.com/login/oauth/access_token"
+            ),
+        )
+        client.cookies.extract_cookies(response)
+        assert len(client.cookies) == 0
+
+        asyncio.run(close_http_client())
+
+    def test_warm_http_client_ignores_connection_errors(self):
+        """Startup warm-up must not fail when GitHub is unreachable"""
+        import httpx
+
+        from app.main import warm_http_client
+
+        mock_client = AsyncMock()
+        mock_client.head.side_effect = httpx.ConnectError("unreachable")
+        with patch("app.main.get_http_client", return_value=mock_client):
+            asyncio.run(warm_http_client())
+
+        mock_client.head.assert_awaited_once_with("/")
+
+
 class TestListUserCodespacesFunction:
     """Test the list_user_codespaces helper function"""
 
-    @patch("app.main.httpx.AsyncClient")
+    @patch_github_client()
     def test_list_codespaces_success(self, mock_client):
         """GitHub API returns multiple codespaces, function filters and returns llmeetcode ones"""
         from app.main import list_user_codespaces
 
         mock_response = MagicMock()
         mock_response.status_code = 200
-        mock_response.json.return_value = GITHUB_CODESPACES_RESPONSE
+        mock_response.content = json.dumps(GITHUB_CODESPACES_RESPONSE).encode()
 
-        mock_client.return_value.__aenter__.return_value.get.return_value = (
-            mock_response
-        )
+        mock_client.return_value.get.return_value = mock_response
 
         result = asyncio.run(list_user_codespaces("test_token"))
 
@@ -1496,18 +2058,16 @@ class TestListUserCodespacesFunction:
             assert "last_used_at" in codespace
             assert "problem_id" in codespace
 
-    @patch("app.main.httpx.AsyncClient")
+    @patch_github_client()
     def test_list_codespaces_filters_by_prefix(self, mock_client):
         """Only returns codespaces with llmeetcode- prefix, ignores others"""
         from app.main import list_user_codespaces
 
         mock_response = MagicMock()
         mock_response.status_code = 200
-        mock_response.json.return_value = GITHUB_CODESPACES_RESPONSE
+        mock_response.content = json.dumps(GITHUB_CODESPACES_RESPONSE).encode()
 
-        mock_client.return_value.__aenter__.return_value.get.return_value = (
-            mock_response
-        )
+        mock_client.return_value.get.return_value = mock_response
 
         result = asyncio.run(list_user_codespaces("test_token"))
 
@@ -1518,18 +2078,16 @@ class TestListUserCodespacesFunction:
         names = [cs["name"] for cs in result]
         assert "other-codespace" not in names
 
-    @patch("app.main.httpx.AsyncClient")
+    @patch_github_client()
     def test_list_codespaces_extracts_problem_id(self, mock_client):
         """Correctly parses problem_id from display_name"""
         from app.main import list_user_codespaces
 
         mock_response = MagicMock()
         mock_response.status_code = 200
-        mock_response.json.return_value = GITHUB_CODESPACES_RESPONSE
+        mock_response.content = json.dumps(GITHUB_CODESPACES_RESPONSE).encode()
 
-        mock_client.return_value.__aenter__.return_value.get.return_value = (
-            mock_response
-        )
+        mock_client.return_value.get.return_value = mock_response
 
         result = asyncio.run(list_user_codespaces("test_token"))
 
@@ -1537,24 +2095,141 @@ class TestListUserCodespacesFunction:
         assert "two-sum" in problem_ids
         assert "merge-sorted" in problem_ids
 
-    @patch("app.main.httpx.AsyncClient")
+    @patch_github_client()
     def test_list_codespaces_empty_response(self, mock_client):
         """Returns empty list when no codespaces exist"""
         from app.main import list_user_codespaces
 
         mock_response = MagicMock()
         mock_response.status_code = 200
-        mock_response.json.return_value = GITHUB_CODESPACES_EMPTY
+        mock_response.content = json.dumps(GITHUB_CODESPACES_EMPTY).encode()
 
-        mock_client.return_value.__aenter__.return_value.get.return_value = (
-            mock_response
-        )
+        mock_client.return_value.get.return_value = mock_response
 
         result = asyncio.run(list_user_codespaces("test_token"))
 
         assert result == []
         assert isinstance(result, list)
 
+    @patch_github_client()
+    def test_list_codespaces_revalidates_with_etag(self, mock_client):
+        """Reuses the previous listing when GitHub answers 304 Not Modified"""
+        from app.main import list_user_codespaces
+
+        first_response = MagicMock()
+        first_response.status_code = 200
+        first_response.headers = {"ETag": '"listing-v1"'}
+        first_response.content = json.dumps(GITHUB_CODESPACES_RESPONSE).encode()
+
+        not_modified_response = MagicMock()
+        not_modified_response.status_code = 304
+        not_modified_response.headers = {"ETag": '"listing-v1"'}
+
+        mock_client.return_value.get.side_effect = [
+            first_response,
+            not_modified_response,
+        ]
+
+        first = asyncio.run(list_user_codespaces("test_token"))
+        second = asyncio.run(list_user_codespaces("test_token"))
+
+        assert second == first
+        second_headers = mock_client.return_value.get.call_args.kwargs["headers"]
+        assert second_headers["If-None-Match"] == '"listing-v1"'
+
+    @patch_github_client()
+    def test_list_codespaces_caches_filtered_listing_by_token_digest(self, mock_client):
+        """The revalidation cache holds llmeetcode entries, not tokens or raw data"""
+        from app.main import (
+            _codespace_list_etags,
+            codespace_listing_key,
+            list_user_codespaces,
+        )
+
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.headers = {"ETag": '"listing-v1"'}
+        mock_response.content = json.dumps(GITHUB_CODESPACES_RESPONSE).encode()
+        mock_client.return_value.get.return_value = mock_response
+
+        result = asyncio.run(list_user_codespaces("test_token", "two-sum"))
+
+        assert [cs["name"] for cs in result] == ["urban-space-abc123"]
+        assert "test_token" not in _codespace_list_etags
+        etag, cached = _codespace_list_etags[codespace_listing_key("test_token")]
+        assert etag == '"listing-v1"'
+        assert [cs["name"] for cs in cached] == [
+            "urban-space-abc123",
+            "cosmic-xyz789",
+        ]
+
+
+class TestCachedCodespaceListing:
+    """Test the short-lived per-user codespace listing cache"""
+
+    CODESPACES = [
+        {"name": "cs-1", "problem_id": "slow-api"},
+        {"name": "cs-2", "problem_id": "two-sum"},
+    ]
+
+    @patch("app.main.list_user_codespaces")
+    def test_reuses_listing_within_ttl(self, mock_list_codespaces):
+        """A second lookup for the same user skips the GitHub call"""
+        from app.main import list_user_codespaces_cached
+
+        mock_list_codespaces.return_value = self.CODESPACES
+
+        first = asyncio.run(list_user_codespaces_cached(1, "test_token"))
+        second = asyncio.run(list_user_codespaces_cached(1, "test_token", "two-sum"))
+
+        assert [cs["name"] for cs in first] == ["cs-1", "cs-2"]
+        assert [cs["name"] for cs in second] == ["cs-2"]
+        mock_list_codespaces.assert_called_once_with("test_token")
+
+    @patch("app.main.list_user_codespaces")
+    def test_invalidation_forces_refresh(self, mock_list_codespaces):
+        """Invalidating a user's entry makes the next lookup call GitHub"""
+        from app.main import (
+            invalidate_codespace_list_cache,
+            list_user_codespaces_cached,
+        )
+
+        mock_list_codespaces.return_value = self.CODESPACES
+
+        asyncio.run(list_user_codespaces_cached(1, "test_token"))
+        invalidate_codespace_list_cache(1)
+        asyncio.run(list_user_codespaces_cached(1, "test_token"))
+
+        assert mock_list_codespaces.call_count == 2
+
+    @patch("app.main.list_user_codespaces")
+    def test_callers_cannot_mutate_cached_entries(self, mock_list_codespaces):
+        """Annotating returned entries does not leak into the cache"""
+        from app.main import list_user_codespaces_cached
+
+        mock_list_codespaces.return_value = self.CODESPACES
+
+        first = asyncio.run(list_user_codespaces_cached(1, "test_token"))
+        first[0]["problem_title"] = "Slow API Performance"
+        second = asyncio.run(list_user_codespaces_cached(1, "test_token"))
+
+        assert "problem_title" not in second[0]
+
+    def test_cache_drops_expired_and_oldest_entries(self):
+        """Writes evict expired listings and keep the cache within its cap"""
+        from app.main import _codespace_list_cache, cache_user_codespace_listing
+
+        with patch("app.main.time.monotonic", return_value=0.0):
+            cache_user_codespace_listing(1, self.CODESPACES)
+        with (
+            patch("app.main.time.monotonic", return_value=100.0),
+            patch("app.main.CODESPACE_LIST_CACHE_SIZE", 2),
+        ):
+            for user_id in (2, 3, 4):
+                cache_user_codespace_listing(user_id, self.CODESPACES)
+
+        assert list(_codespace_list_cache) == [3, 4]
+
 
 class TestListCodespacesEndpoint:
     """Test GET /codespaces/list endpoint"""
@@ -1652,30 +2327,26 @@ class TestGetActiveCodespaceEndpoint:
 class TestDeleteCodespaceFunction:
     """Test the delete_codespace helper function"""
 
-    @patch("app.main.httpx.AsyncClient")
+    @patch_github_client()
     def test_delete_codespace_success(self, mock_client):
         """Deletion succeeds with 202 response"""
         mock_response = MagicMock()
         mock_response.status_code = 202
 
-        mock_client.return_value.__aenter__.return_value.delete.return_value = (
-            mock_response
-        )
+        mock_client.return_value.delete.return_value = mock_response
 
         result = asyncio.run(delete_codespace("test_token", "urban-space-abc123"))
 
         assert result is True
-        mock_client.return_value.__aenter__.return_value.delete.assert_called_once()
+        mock_client.return_value.delete.assert_called_once()
 
-    @patch("app.main.httpx.AsyncClient")
+    @patch_github_client()
     def test_delete_codespace_not_found(self, mock_client):
         """Returns 404 when codespace doesn't exist"""
         mock_response = MagicMock()
         mock_response.status_code = 404
 
-        mock_client.return_value.__aenter__.return_value.delete.return_value = (
-            mock_response
-        )
+        mock_client.return_value.delete.return_value = mock_response
 
         with pytest.raises(HTTPException) as exc_info:
             asyncio.run(delete_codespace("test_token", "nonexistent"))
@@ -1683,16 +2354,16 @@ class TestDeleteCodespaceFunction:
         assert exc_info.value.status_code == 404
         assert "not found" in exc_info.value.detail.lower()
 
-    @patch("app.main.httpx.AsyncClient")
+    @patch_github_client()
     def test_delete_codespace_api_error(self, mock_client):
         """Handles GitHub API errors appropriately"""
         mock_response = MagicMock()
         mock_response.status_code = 500
-        mock_response.json.return_value = {"message": "Internal Server Error"}
+        mock_response.content = json.dumps(
+            {"message": "Internal Server Error"}
+        ).encode()
 
-        mock_client.return_value.__aenter__.return_value.delete.return_value = (
-            mock_response
-        )
+        mock_client.return_value.delete.return_value = mock_response
 
         with pytest.raises(HTTPException) as exc_info:
             asyncio.run(delete_codespace("test_token", "some-codespace"))
@@ -1700,16 +2371,16 @@ class TestDeleteCodespaceFunction:
         assert exc_info.value.status_code == 500
         assert "Failed to delete codespace" in exc_info.value.detail
 
-    @patch("app.main.httpx.AsyncClient")
+    @patch_github_client()
     def test_delete_codespace_forbidden(self, mock_client):
         """Handles 403 forbidden response"""
         mock_response = MagicMock()
         mock_response.status_code = 403
-        mock_response.json.return_value = {"message": "Must have admin access"}
+        mock_response.content = json.dumps(
+            {"message": "Must have admin access"}
+        ).encode()
 
-        mock_client.return_value.__aenter__.return_value.delete.return_value = (
-            mock_response
-        )
+        mock_client.return_value.delete.return_value = mock_response
 
         with pytest.raises(HTTPException) as exc_info:
             asyncio.run(delete_codespace("test_token", "someone-elses-codespace"))
@@ -2020,7 +2691,7 @@ class TestTokenBasedCompletion:
 
         # Create a valid token
         token = CodespaceToken(
-            token="valid_test_token_12345",
+            token_hash=hash_codespace_token("valid_test_token_12345"),
             user_id=user.id,
             problem_id="two-sum",
             codespace_name="test-codespace",
@@ -2067,7 +2738,7 @@ class TestTokenBasedCompletion:
 
         # Create an expired token
         token = CodespaceToken(
-            token="expired_test_token_12345",
+            token_hash=hash_codespace_token("expired_test_token_12345"),
             user_id=user.id,
             problem_id="two-sum",
             codespace_name="test-codespace-2",
@@ -2109,7 +2780,7 @@ class TestTokenBasedCompletion:
 
         # Create a valid token
         token = CodespaceToken(
-            token="already_complete_token_12345",
+            token_hash=hash_codespace_token("already_complete_token_12345"),
             user_id=user.id,
             problem_id="two-sum",
             codespace_name="test-codespace-3",
@@ -2146,7 +2817,7 @@ class TestTokenBasedCompletion:
 
         # Create a valid token
         token = CodespaceToken(
-            token="mark_used_token_12345",
+            token_hash=hash_codespace_token("mark_used_token_12345"),
             user_id=user.id,
             problem_id="slow-api",
             codespace_name="test-codespace-4",